@@ -0,0 +1,469 @@
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from decoder import (OP_BEQ, OP_CALL, OP_RET, OP_ADD, OP_SUB, OP_NOR, OP_MUL, STATION_TYPE, READS_RT,
+                     IS_CONTROL, ADVANCES_PC, decodeInstructions)
+from tomasulo import Instruction, Tomasulo
+
+HardwareRows = List[Optional[List[int]]]
+
+NEVER = np.iinfo(np.int64).max  # Sort key of an empty slot
+
+def supportsConfig(rows: HardwareRows, writebackPolicy: str = "programOrder") -> bool:
+    # The batch engine covers configurations where every instance takes at least one cycle per
+    # phase. Zero-cycle stations finish at issue or skip address calculation, which the scalar
+    # engine handles with paths the batch engine does not model.
+    if writebackPolicy not in Tomasulo.writebackPriority:
+        return False
+    for i in range(Tomasulo.nStationTypes):
+        row = rows[i]
+        if row is None or row[0] == 0:
+            continue
+        if row[1] < 1 or (i < 2 and (len(row) < 3 or row[2] < 1)):
+            return False
+    return True
+
+class BatchTomasulo:
+    # Runs one program on many hardware configurations in lockstep. Station, register status and
+    # counter state live in (configuration, ...) arrays, and every cycle applies the scalar engine's
+    # issue, write-back and execute phases to all configurations at once. Configurations that
+    # finished or hit a budget are masked out. Stations are laid out by type, padded to the
+    # largest unit count of each type in the batch; a station's tag is its slot + 1. Memory images
+    # live in a shared pool: every configuration reads the initial image in slot 0 until its first
+    # store gives it a copy of its own, so programs that never store keep one image per batch.
+    # Per-configuration arrays, one row each. While running, rows of finished configurations are
+    # dropped from the working copies and stored back in their original order at the end.
+    rowFields = ("issueWidth", "present", "cyclesExec", "cyclesAddr", "priorityBase", "busy", "qj", "qk",
+                 "vj", "vk", "addr", "remExec", "remAddr", "instIndex", "result", "seq", "issueCycle",
+                 "pc", "registers", "registerStatus", "stateCount", "stateSeq", "stateStatus", "nextSeq",
+                 "memSlot", "cycle", "wbInsts", "numBne", "misprediction", "issueHistogram", "issueStalls",
+                 "occupancyHistogram", "lsqDepthHistogram", "cdbBusyCycles", "storePortBusyCycles")
+
+    def __init__(self, program: List[Instruction], hardware: Sequence[HardwareRows], pc: int = 0,
+                 memory: Optional[Sequence[int]] = None, writebackPolicy: str = "programOrder"):
+        for rows in hardware:
+            if not supportsConfig(rows, writebackPolicy):
+                raise ValueError("Configuration not supported by the batch engine; simulate it with Tomasulo")
+        self.program = program
+        decoded = decodeInstructions(program)
+        self.n = len(decoded)
+        self.opOf = np.array(decoded.op, dtype=np.int64)
+        self.rdOf = np.array(decoded.rd, dtype=np.int64)
+        self.rsOf = np.array(decoded.rs, dtype=np.int64)
+        self.rtOf = np.array(decoded.rt, dtype=np.int64)
+        self.immOf = np.array(decoded.imm, dtype=np.int64)
+        self.stationTypeOf = np.array(STATION_TYPE, dtype=np.int64)
+        self.readsRt = np.array(READS_RT)
+        self.isControl = np.array(IS_CONTROL)
+        self.advancesPc = np.array(ADVANCES_PC)
+
+        B = self.size = len(hardware)
+        T = Tomasulo.nStationTypes
+        units = np.zeros((B, T), dtype=np.int64)
+        execCycles = np.zeros((B, T), dtype=np.int64)
+        addrCycles = np.zeros((B, T), dtype=np.int64)
+        self.issueWidth = np.full(B, Tomasulo.defaultIssueWidth, dtype=np.int64)
+        for b, rows in enumerate(hardware):
+            for i in range(T):
+                if rows[i] is not None:
+                    units[b, i] = rows[i][0]
+                    execCycles[b, i] = rows[i][1]
+                    addrCycles[b, i] = rows[i][2] if i < 2 and len(rows[i]) > 2 else 0
+            if len(rows) > T and rows[T] is not None:
+                self.issueWidth[b] = rows[T][0]
+        self.units = units
+        self.maxWidth = int(self.issueWidth.max())
+
+        # Slot layout shared by every configuration
+        maxUnits = units.max(axis=0)
+        self.typeStart = np.concatenate(([0], np.cumsum(maxUnits)[:-1]))
+        self.typeEnd = self.typeStart + maxUnits
+        S = int(maxUnits.sum())
+        self.slotType = np.repeat(np.arange(T), maxUnits)
+        slotRank = np.arange(S) - self.typeStart[self.slotType]
+        self.present = slotRank[None, :] < units[:, self.slotType]
+        self.cyclesExec = execCycles[:, self.slotType]
+        self.cyclesAddr = addrCycles[:, self.slotType]
+        self.isMemSlot = self.slotType < 2
+        self.isStoreSlot = self.slotType == 1
+        self.loadSlots = slice(int(self.typeStart[0]), int(self.typeEnd[0]))
+        self.storeSlots = slice(int(self.typeStart[1]), int(self.typeEnd[1]))
+        if writebackPolicy == "longestLatencyFirst":
+            self.priorityBase = -(self.cyclesAddr + self.cyclesExec) << 32
+        else:
+            self.priorityBase = np.zeros((B, S), dtype=np.int64)
+
+        # Station fields
+        self.busy = np.zeros((B, S), dtype=bool)
+        self.qj = np.zeros((B, S), dtype=np.int64)
+        self.qk = np.zeros((B, S), dtype=np.int64)
+        self.vj = np.zeros((B, S), dtype=np.int64)
+        self.vk = np.zeros((B, S), dtype=np.int64)
+        self.addr = np.zeros((B, S), dtype=np.int64)
+        self.remExec = np.zeros((B, S), dtype=np.int64)
+        self.remAddr = np.zeros((B, S), dtype=np.int64)
+        self.instIndex = np.zeros((B, S), dtype=np.int64)
+        self.result = np.zeros((B, S), dtype=np.int64)
+        self.seq = np.zeros((B, S), dtype=np.int64)
+        self.issueCycle = np.zeros((B, S), dtype=np.int64)
+
+        # Architectural and speculation state. A configuration holds at most one branch state per
+        # BEQ and CALL/RET station.
+        R = Tomasulo.nRegisters
+        D = int(maxUnits[2] + maxUnits[3]) + 1
+        self.pc = np.full(B, pc, dtype=np.int64)
+        self.registers = np.zeros((B, R), dtype=np.int64)
+        self.registerStatus = np.zeros((B, R), dtype=np.int64)
+        self.stateCount = np.zeros(B, dtype=np.int64)
+        self.stateSeq = np.zeros((B, D), dtype=np.int64)
+        self.stateStatus = np.zeros((B, D, R), dtype=np.int64)
+        self.nextSeq = np.ones(B, dtype=np.int64)
+        self.memPool = np.zeros((1, Tomasulo.memWords), dtype=np.uint16)
+        if memory is not None:
+            self.memPool[0] = np.asarray(memory, dtype=np.uint16)
+        self.memImages = 1
+        self.memSlot = np.zeros(B, dtype=np.int64)
+
+        # Counters behind Tomasulo.metrics()
+        self.cycle = np.ones(B, dtype=np.int64)
+        self.wbInsts = np.zeros(B, dtype=np.int64)
+        self.numBne = np.zeros(B, dtype=np.int64)
+        self.misprediction = np.zeros(B, dtype=np.int64)
+        self.issueHistogram = np.zeros((B, self.maxWidth + 1), dtype=np.int64)
+        self.issueStalls = np.zeros((B, len(Tomasulo.stallCauses)), dtype=np.int64)
+        self.occupancyHistogram = np.zeros((B, T, int(maxUnits.max()) + 1), dtype=np.int64)
+        self.lsqDepthHistogram = np.zeros((B, int(maxUnits[0] + maxUnits[1]) + 1), dtype=np.int64)
+        self.cdbBusyCycles = np.zeros(B, dtype=np.int64)
+        self.storePortBusyCycles = np.zeros(B, dtype=np.int64)
+        self.maxCycles = Tomasulo.defaultMaxCycles
+        self.maxInstructions = 0
+        self.active = np.ones(B, dtype=bool)
+
+    def run(self):
+        # Tomasulo.run for every configuration: each stops on its own when it finishes or hits
+        # a budget, and the batch ends when all of them have
+        maxCycles = self.maxCycles or sys.maxsize
+        maxInstructions = self.maxInstructions or sys.maxsize
+        cycleCount = 0
+        self.active[:] = cycleCount < maxCycles
+        home = {name: getattr(self, name) for name in self.rowFields}
+        rows = np.arange(self.size)
+        while self.active.any():
+            self.nextCycle(self.active)
+            cycleCount += 1
+            self.active &= ((self.busy.any(axis=1) | (self.pc < self.n)) & (cycleCount < maxCycles) &
+                            (self.wbInsts < maxInstructions))
+            if self.active.sum() * 4 <= len(rows) * 3:
+                rows = self.compact(home, rows)
+        self.compact(home, rows)
+        for name, values in home.items():
+            setattr(self, name, values)
+        self.active = np.zeros(self.size, dtype=bool)
+
+    def isFinished(self, b: int) -> bool:
+        # Tomasulo.isFinished for configuration b
+        return not self.busy[b].any() and self.pc[b] >= self.n
+
+    def compact(self, home: Dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+        # Store the finished rows back home and keep working on the active ones only. Returns the
+        # original indices of the remaining rows.
+        keep = np.flatnonzero(self.active)
+        done = np.flatnonzero(~self.active)
+        for name in self.rowFields:
+            values = getattr(self, name)
+            if values is not home[name]:
+                home[name][rows[done]] = values[done]
+            setattr(self, name, values[keep])
+        self.active = self.active[keep]
+        return rows[keep]
+
+    def nextCycle(self, active: np.ndarray):
+        self.issue(active & (self.pc < self.n))
+        self.writeBack(active)
+        self.execute(active)
+        self.sampleUtilization(active)
+        self.cycle += active
+
+    def issue(self, issuing: np.ndarray):
+        # Issue slot by slot; each slot is one instruction for every configuration still issuing
+        issued = np.zeros(len(self.pc), dtype=np.int64)
+        going = issuing.copy()
+        for k in range(self.maxWidth):
+            going &= (k < self.issueWidth) & (self.pc < self.n)
+            b = np.flatnonzero(going)
+            if not b.size:
+                break
+            pc = self.pc[b]
+            op = self.opOf[pc]
+            free = self.present[b] & ~self.busy[b] & (self.slotType == self.stationTypeOf[op][:, None])
+            slot = free.argmax(axis=1)
+            found = free[np.arange(b.size), slot]
+            going[b[~found]] = False  # A full station type stalls the rest of the group
+            b, pc, op, slot = b[found], pc[found], op[found], slot[found]
+
+            seq = self.nextSeq[b]
+            self.nextSeq[b] += 1
+            self.busy[b, slot] = True
+            self.addr[b, slot] = self.immOf[pc]
+            self.remAddr[b, slot] = self.cyclesAddr[b, slot]
+            self.remExec[b, slot] = self.cyclesExec[b, slot]
+            self.instIndex[b, slot] = pc
+            self.seq[b, slot] = seq
+            self.issueCycle[b, slot] = self.cycle[b]
+
+            rs = self.rsOf[pc]
+            tag = self.registerStatus[b, rs]
+            self.qj[b, slot] = tag
+            self.vj[b, slot] = np.where(tag == 0, self.registers[b, rs], self.vj[b, slot])
+
+            readsRt = self.readsRt[op]
+            bk, slotK, pcK = b[readsRt], slot[readsRt], pc[readsRt]
+            rt = self.rtOf[pcK]
+            tag = self.registerStatus[bk, rt]
+            self.qk[bk, slotK] = tag
+            self.vk[bk, slotK] = np.where(tag == 0, self.registers[bk, rt], self.vk[bk, slotK])
+
+            # Renames go to the live table, or in a branch shadow to the newest branch state
+            rd = self.rdOf[pcK]
+            renames = rd != 0
+            br, slotR, rd = bk[renames], slotK[renames], rd[renames]
+            depth = self.stateCount[br]
+            live = depth == 0
+            self.registerStatus[br[live], rd[live]] = slotR[live] + 1
+            self.stateStatus[br[~live], depth[~live] - 1, rd[~live]] = slotR[~live] + 1
+
+            control = self.isControl[op]
+            bc = b[control]
+            depth = self.stateCount[bc]
+            self.stateStatus[bc, depth] = np.where((depth == 0)[:, None], self.registerStatus[bc],
+                                                   self.stateStatus[bc, np.maximum(depth - 1, 0)])
+            self.stateSeq[bc, depth] = seq[control]
+            self.stateCount[bc] += 1
+
+            issued[b] += 1
+            advances = self.advancesPc[op]
+            self.pc[b[advances]] += 1
+            going[b[~advances]] = False  # CALL/RET end the group
+
+        rows = np.flatnonzero(issuing)
+        self.issueHistogram[rows, issued[rows]] += 1
+        stalled = np.flatnonzero(issuing & (issued == 0))
+        if stalled.size:
+            self.issueStalls[stalled, self.stallCauses(stalled)] += 1
+
+    def stallCauses(self, b: np.ndarray) -> np.ndarray:
+        # Tomasulo.issueStallCause for each stalled configuration
+        stationType = self.stationTypeOf[self.opOf[self.pc[b]]]
+        candidates = self.busy[b] & (self.slotType == stationType[:, None])
+        oldest = np.where(candidates, self.seq[b], NEVER).argmin(axis=1)
+        rows = np.arange(b.size)
+        waiting = (self.qj[b, oldest] != 0) | (self.qk[b, oldest] != 0)
+        shadowed = (self.stateCount[b] > 0) & (self.seq[b, oldest] > self.stateSeq[b, 0])
+        cause = np.where(waiting, Tomasulo.STALL_OPERAND_WAIT,
+                         np.where(shadowed, Tomasulo.STALL_BRANCH_SHADOW, Tomasulo.STALL_STRUCTURAL))
+        return np.where(candidates[rows, oldest], cause, Tomasulo.STALL_STRUCTURAL)
+
+    def writeBack(self, active: np.ndarray):
+        # Both winners are chosen before either releases its station, as in the scalar engine
+        finished = self.busy & (self.remAddr == 0) & (self.remExec == 0) & active[:, None]
+        priority = self.priorityBase + self.seq
+        stores = finished & self.isStoreSlot & (self.qk == 0)
+        results = finished & ~self.isStoreSlot
+        storeSlot = np.where(stores, priority, NEVER).argmin(axis=1)
+        resultSlot = np.where(results, priority, NEVER).argmin(axis=1)
+        rows = np.arange(len(self.pc))
+        bs = np.flatnonzero(stores[rows, storeSlot])
+        bw = np.flatnonzero(results[rows, resultSlot])
+
+        if bs.size:
+            slot = storeSlot[bs]
+            self.wbInsts[bs] += 1
+            self.storePortBusyCycles[bs] += 1
+            self.busy[bs, slot] = False
+            self.claimMemory(bs)
+            self.memPool[self.memSlot[bs], self.addr[bs, slot]] = self.vk[bs, slot] & 0xFFFF
+
+        if not bw.size:
+            return
+        slot = resultSlot[bw]
+        self.wbInsts[bw] += 1
+        self.cdbBusyCycles[bw] += 1
+        self.busy[bw, slot] = False
+        stationType = self.slotType[slot]
+        instIndex = self.instIndex[bw, slot]
+        op = self.opOf[instIndex]
+
+        call = op == OP_CALL
+        self.registers[bw[call], 1] = instIndex[call] + 1
+        self.pc[bw[call]] = instIndex[call] + 1 + self.addr[bw[call], slot[call]]
+        ret = op == OP_RET
+        self.pc[bw[ret]] = self.registers[bw[ret], 1]
+
+        beq = stationType == 2
+        self.numBne[bw[beq]] += 1
+        taken = beq & (self.result[bw, slot] != 0)
+        self.pc[bw[taken]] = instIndex[taken] + 1 + self.addr[bw[taken], slot[taken]]
+        self.misprediction[bw[taken]] += 1
+        notTaken = beq & ~taken
+        self.pc[bw[notTaken]] = instIndex[notTaken] + 1
+        self.popBranchState(bw[notTaken & (self.stateCount[bw] > 0)])
+
+        flush = taken | (stationType == 3)
+        self.flushYounger(bw[flush], self.seq[bw[flush], slot[flush]])
+        results = (stationType != 1) & (stationType != 2)
+        self.broadcast(bw[results], slot[results] + 1, self.result[bw[results], slot[results]] & 0xFFFF)
+
+    def claimMemory(self, b: np.ndarray):
+        # Give the configurations still reading the shared initial image copies of their own
+        b = b[self.memSlot[b] == 0]
+        if not b.size:
+            return
+        needed = self.memImages + b.size
+        if needed > len(self.memPool):
+            pool = np.empty((max(needed, 2 * len(self.memPool)), Tomasulo.memWords), dtype=np.uint16)
+            pool[:self.memImages] = self.memPool[:self.memImages]
+            self.memPool = pool
+        slots = np.arange(self.memImages, needed)
+        self.memPool[slots] = self.memPool[0]
+        self.memSlot[b] = slots
+        self.memImages = needed
+
+    def memoryOf(self, b: int) -> np.ndarray:
+        # Final memory image of configuration b
+        return self.memPool[self.memSlot[b]]
+
+    def popBranchState(self, b: np.ndarray):
+        # Not-taken branch: restore the oldest branch state and drop it
+        if not b.size:
+            return
+        self.registerStatus[b] = self.stateStatus[b, 0]
+        self.stateStatus[b, :-1] = self.stateStatus[b, 1:]
+        self.stateSeq[b, :-1] = self.stateSeq[b, 1:]
+        self.stateCount[b] -= 1
+
+    def flushYounger(self, b: np.ndarray, branchSeq: np.ndarray):
+        if not b.size:
+            return
+        flushed = self.busy[b] & (self.seq[b] > branchSeq[:, None])
+        self.busy[b] &= ~flushed
+        status = self.registerStatus[b]
+        rows = np.arange(b.size)[:, None]
+        renamedByFlushed = (status > 0) & flushed[rows, np.maximum(status - 1, 0)]
+        self.registerStatus[b] = np.where(renamedByFlushed, 0, status)
+        self.stateCount[b] = 0
+
+    def broadcast(self, b: np.ndarray, tag: np.ndarray, result: np.ndarray):
+        if not b.size:
+            return
+        tag = tag[:, None]
+        result = result[:, None]
+        status = self.registerStatus[b]
+        written = status == tag
+        written[:, 0] = False
+        self.registers[b] = np.where(written, result, self.registers[b])
+        self.registerStatus[b] = np.where(written, 0, status)
+
+        busy = self.busy[b]
+        qj, qk = self.qj[b], self.qk[b]
+        fromJ = busy & (qj == tag)
+        fromK = busy & (qk == tag)
+        self.vj[b] = np.where(fromJ, result, self.vj[b])
+        self.vk[b] = np.where(fromK, result, self.vk[b])
+        qj = np.where(fromJ, 0, qj)
+        qk = np.where(fromK, 0, qk)
+        self.qj[b] = qj
+        self.qk[b] = qk
+        # A waiter whose operands are all ready (re)starts its execution countdown
+        start = (fromJ | fromK) & (qj == 0) & (qk == 0)
+        self.remExec[b] = np.where(start, self.cyclesExec[b], self.remExec[b])
+
+    def execute(self, active: np.ndarray):
+        shadowFree = (self.stateCount == 0)[:, None] | (self.seq <= self.stateSeq[:, :1])
+        eligible = self.busy & (self.issueCycle < self.cycle[:, None]) & shadowFree & active[:, None]
+
+        # Non-load/store stations
+        counting = eligible & ~self.isMemSlot & (self.qj == 0) & (self.qk == 0) & (self.remExec > 0)
+        self.remExec -= counting
+        b, slot = np.nonzero(counting & (self.remExec == 0))
+        if b.size:
+            self.result[b, slot] = self.operationResults(b, slot)
+
+        # Load/store stations: the load/store queue holds the ones still computing an address,
+        # and only its head may count address cycles
+        inQueue = self.busy & self.isMemSlot & (self.remAddr > 0)
+        head = np.where(inQueue, self.seq, NEVER).min(axis=1)
+        memoryPhase = eligible & self.isMemSlot & (self.remAddr == 0) & (self.remExec > 0)
+        addressing = eligible & inQueue & (self.qj == 0) & (self.seq == head[:, None])
+        self.remAddr -= addressing
+        b, slot = np.nonzero(addressing & (self.remAddr == 0))
+        self.addr[b, slot] = (self.addr[b, slot] + self.vj[b, slot]) & 0xFFFF
+
+        loads = self.loadSlots
+        loading = memoryPhase[:, loads]
+        self.remExec[:, loads] -= loading
+        b, slot = np.nonzero(loading & (self.remExec[:, loads] == 0))
+        slot += loads.start
+        self.result[b, slot] = self.memPool[self.memSlot[b], self.addr[b, slot]]
+
+        # Write After Read: a store waits while an older load to its address has not read memory
+        stores = self.storeSlots
+        storing = memoryPhase[:, stores]
+        if storing.any():
+            pendingLoads = self.busy[:, loads] & (self.remExec[:, loads] != 0)
+            blocked = (pendingLoads[:, :, None] &
+                       (self.addr[:, loads][:, :, None] == self.addr[:, stores][:, None, :]) &
+                       (self.seq[:, loads][:, :, None] < self.seq[:, stores][:, None, :])).any(axis=1)
+            self.remExec[:, stores] -= storing & ~blocked
+
+    def operationResults(self, b: np.ndarray, slot: np.ndarray) -> np.ndarray:
+        instIndex = self.instIndex[b, slot]
+        op = self.opOf[instIndex]
+        vj = self.vj[b, slot]
+        vk = self.vk[b, slot]
+        return np.select(
+            [op == OP_BEQ, op == OP_CALL, op == OP_RET, op == OP_ADD, op == OP_SUB, op == OP_NOR, op == OP_MUL],
+            [(vj == vk).astype(np.int64), instIndex + 1, vj, vj + vk, vj - vk, ~(vj | vk) & 0xFFFF, (vj * vk) & 0xFFFF],
+            self.result[b, slot])
+
+    def sampleUtilization(self, active: np.ndarray):
+        b = np.flatnonzero(active)
+        cumulative = np.concatenate((np.zeros((b.size, 1), dtype=np.int64), np.cumsum(self.busy[b], axis=1)), axis=1)
+        busyByType = cumulative[:, self.typeEnd] - cumulative[:, self.typeStart]
+        types = np.arange(Tomasulo.nStationTypes)
+        self.occupancyHistogram[b[:, None], types[None, :], busyByType] += 1
+        depth = (self.busy[b] & self.isMemSlot & (self.remAddr[b] > 0)).sum(axis=1)
+        self.lsqDepthHistogram[b, depth] += 1
+
+    def metrics(self) -> List[Dict[str, float]]:
+        # Tomasulo.metrics() for every configuration, in batch order
+        results = []
+        for b in range(self.size):
+            cycles = int(self.cycle[b]) - 1
+            wbInsts = int(self.wbInsts[b])
+            numBne = int(self.numBne[b])
+            misprediction = int(self.misprediction[b])
+            issueHistogram = self.issueHistogram[b].tolist()
+            issueCycles = sum(issueHistogram)
+            row: Dict[str, float] = {
+                "cycles": cycles,
+                "instructions": wbInsts,
+                "ipc": wbInsts / cycles if cycles else 0,
+                "branches": numBne,
+                "mispredictions": misprediction,
+                "mispredictionRate": misprediction / numBne if numBne else 0,
+                "issueWidth": int(self.issueWidth[b]),
+                "issuedPerCycle": sum(n * count for n, count in enumerate(issueHistogram)) / issueCycles if issueCycles else 0,
+            }
+            for i, name in enumerate(Tomasulo.stationNames):
+                row[f"{name}Occupancy"] = Tomasulo.averageOf(self.occupancyHistogram[b, i].tolist())
+            for cause, count in zip(Tomasulo.stallCauses, self.issueStalls[b].tolist()):
+                row[f"{cause}Stalls"] = count
+            lsqDepthHistogram = self.lsqDepthHistogram[b].tolist()
+            row["cdbUtilization"] = int(self.cdbBusyCycles[b]) / cycles if cycles else 0
+            row["storePortUtilization"] = int(self.storePortBusyCycles[b]) / cycles if cycles else 0
+            row["avgLsqDepth"] = Tomasulo.averageOf(lsqDepthHistogram)
+            row["maxLsqDepth"] = max((d for d, count in enumerate(lsqDepthHistogram) if count), default=0)
+            results.append(row)
+        return results
@@ -0,0 +1,152 @@
+import json
+import platform
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from events import NullSink
+from tomasulo import Instruction, Tomasulo
+
+# Every workload is an endless loop; runs are bounded by an instruction budget
+
+def rawChain(size: int) -> List[str]:
+    # Each instruction reads the previous one's result
+    ops = ["ADD R2, R2, R3", "SUB R2, R2, R4", "NOR R2, R2, R5", "MUL R2, R2, R6"]
+    body = [ops[k % len(ops)] for k in range(size)]
+    return body + [f"BEQ R0, R0, {-(size + 1)}"]
+
+def independentAlu(size: int) -> List[str]:
+    # No true dependencies: destinations rotate and sources are never written
+    ops = ["ADD", "SUB", "NOR", "MUL"]
+    body = [f"{ops[k % len(ops)]} R{2 + k % 6}, R0, R1" for k in range(size)]
+    return body + [f"BEQ R0, R0, {-(size + 1)}"]
+
+def memoryMix(size: int) -> List[str]:
+    # Loads and stores over a small set of addresses, with ALU work on the loaded values
+    body = []
+    for k in range(size):
+        addr = k % 16
+        kind = k % 4
+        if kind == 0:
+            body.append(f"LOAD R{2 + k % 3}, {addr}(R0)")
+        elif kind == 1:
+            body.append(f"STORE R{5 + k % 3}, {addr}(R0)")
+        elif kind == 2:
+            body.append(f"ADD R{5 + k % 3}, R{2 + k % 3}, R{5 + (k + 1) % 3}")
+        else:
+            body.append(f"LOAD R{2 + (k + 1) % 3}, {(addr + 8) % 16}(R0)")
+    return body + [f"BEQ R0, R0, {-(size + 1)}"]
+
+def branchLoop(size: int) -> List[str]:
+    # Short loop bodies alternating ALU work with always-taken forward branches, plus the back edge.
+    # Every branch is taken: a not-taken branch restores the rename snapshot taken at its issue,
+    # which can revive tags of producers that wrote back in between.
+    body = []
+    for k in range(size):
+        body.append(f"ADD R{2 + k % 6}, R{2 + (k + 5) % 6}, R0" if k % 2 == 0 else "BEQ R0, R0, 0")
+    return body + [f"BEQ R0, R0, {-(size + 1)}"]
+
+def callRet(size: int, depth: int = 3) -> List[str]:
+    # A loop calling a chain of depth nested functions, each with size body instructions.
+    # Level l keeps its return address in R(8 - l) across the inner call.
+    program = ["CALL 1", "BEQ R0, R0, -2"]
+    for level in range(1, depth + 1):
+        body = ["ADD R2, R2, R3" if k % 2 == 0 else "SUB R3, R3, R2" for k in range(size)]
+        if level < depth:
+            save = f"R{8 - level}"
+            # The next function starts right after this one's size + 4 instructions
+            function = [f"ADD {save}, R1, R0", f"CALL {size + 2}", f"ADD R1, {save}, R0"] + body + ["RET"]
+        else:
+            function = body + ["RET"]
+        program += function
+    return program
+
+WORKLOADS: Dict[str, Callable[[int], List[str]]] = {
+    "rawChain": rawChain,
+    "independentAlu": independentAlu,
+    "memoryMix": memoryMix,
+    "branchLoop": branchLoop,
+    "callRet": callRet,
+}
+
+def scaledHardware(scale: int) -> List[List[int]]:
+    # The default configuration with every station type's unit count multiplied by scale
+    return [[row[0] * scale] + row[1:] for row in Tomasulo.defaultHardware]
+
+def runBenchmark(workload: str, size: int, scale: int, instructions: int, repeat: int = 3,
+                 skipIdle: bool = False, specialize: bool = False) -> Dict[str, object]:
+    program = [Instruction(text, k) for k, text in enumerate(WORKLOADS[workload](size))]
+    rows = scaledHardware(scale)
+    best = None
+    for _ in range(repeat):
+        sim = Tomasulo.fromConfig(program, rows, 0)
+        sim.setSink(NullSink())
+        sim.maxCycles = instructions * 100  # Guards against a workload that stops retiring
+        sim.maxInstructions = instructions
+        sim.eventSkipping = skipIdle
+        sim.specializeCycle = specialize
+        start = time.perf_counter()
+        sim.initiateRunning()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, sim.cycle - 1, sim.wbInsts)
+
+    seconds, cycles, retired = best
+    return {
+        "workload": workload,
+        "size": size,
+        "stationScale": scale,
+        "stations": sum(row[0] for row in rows),
+        "cycles": cycles,
+        "instructions": retired,
+        "seconds": seconds,
+        "cyclesPerSec": cycles / seconds if seconds else 0,
+        "instructionsPerSec": retired / seconds if seconds else 0,
+    }
+
+def runSuite(workloads: Sequence[str], sizes: Sequence[int], scales: Sequence[int], instructions: int,
+             repeat: int = 3, skipIdle: bool = False, report: Optional[Callable[[Dict[str, object]], None]] = None,
+             specialize: bool = False) -> Dict[str, object]:
+    results = []
+    for workload in workloads:
+        for size in sizes:
+            for scale in scales:
+                result = runBenchmark(workload, size, scale, instructions, repeat, skipIdle, specialize)
+                results.append(result)
+                if report:
+                    report(result)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "instructionBudget": instructions,
+        "skipIdle": skipIdle,
+        "specialize": specialize,
+        "results": results,
+    }
+
+def formatResult(result: Dict[str, object]) -> str:
+    return (f"{result['workload']:<16} size {result['size']:<5} x{result['stationScale']:<3} "
+            f"{result['stations']:>4} stations  {result['cyclesPerSec']:>12,.0f} cycles/s  "
+            f"{result['instructionsPerSec']:>12,.0f} instructions/s")
+
+def saveBaseline(suite: Dict[str, object], outFile: str):
+    with open(outFile, "w") as f:
+        json.dump(suite, f, indent=2)
+
+def compareBaseline(suite: Dict[str, object], baselineFile: str, tolerance: float) -> List[str]:
+    # Cases whose instruction throughput fell more than tolerance (a fraction) below the baseline
+    with open(baselineFile) as f:
+        baseline = json.load(f)
+    previous = {(r["workload"], r["size"], r["stationScale"]): r for r in baseline["results"]}
+
+    regressions = []
+    for result in suite["results"]:
+        old = previous.get((result["workload"], result["size"], result["stationScale"]))
+        if old is None or not old["instructionsPerSec"]:
+            continue
+        change = result["instructionsPerSec"] / old["instructionsPerSec"] - 1
+        if change < -tolerance:
+            regressions.append(f"{result['workload']} size {result['size']} x{result['stationScale']}: "
+                               f"{old['instructionsPerSec']:,.0f} -> {result['instructionsPerSec']:,.0f} "
+                               f"instructions/s ({change:+.1%})")
+    return regressions
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from typing import Callable, List, Optional, Sequence
+
+# Opcode numbers index the per-opcode tables below
+OPCODES = ["load", "store", "beq", "call", "ret", "add", "sub", "nor", "mul"]
+OP_LOAD, OP_STORE, OP_BEQ, OP_CALL, OP_RET, OP_ADD, OP_SUB, OP_NOR, OP_MUL = range(len(OPCODES))
+OPCODE_OF = {name: op for op, name in enumerate(OPCODES)}
+
+STATION_TYPE = [0, 1, 2, 3, 3, 4, 5, 6, 7]
+READS_RT = [False, True, True, False, False, True, True, True, True]
+IS_MEMORY = [True, True, False, False, False, False, False, False, False]
+IS_CONTROL = [False, False, True, True, True, False, False, False, False]
+ADVANCES_PC = [True, True, True, False, False, True, True, True, True]
+
+CACHE_MAGIC = b"TDEC"
+CACHE_VERSION = 1
+CACHE_DIR_ENV = "TOMASULO_DECODE_CACHE"
+
+class DecodedProgram:
+    # Parallel arrays, one entry per instruction, plus the source text for display
+    def __init__(self, n: int = 0):
+        self.op = array("b", bytes(n))
+        self.stationType = array("b", bytes(n))
+        self.rd = array("b", bytes(n))
+        self.rs = array("b", bytes(n))
+        self.rt = array("b", bytes(n))
+        self.imm = array("i", bytes(4 * n))
+        self.lineIndex = array("i", bytes(4 * n))
+        self.text: List[str] = [""] * n
+
+    def __len__(self):
+        return len(self.op)
+
+    def firstDifference(self, other: "DecodedProgram") -> int:
+        # Index of the first instruction that decodes differently, the shorter length when one
+        # program extends the other, or sys.maxsize when they are the same
+        rows = zip(self.op, self.rd, self.rs, self.rt, self.imm)
+        otherRows = zip(other.op, other.rd, other.rs, other.rt, other.imm)
+        for k, (row, otherRow) in enumerate(zip(rows, otherRows)):
+            if row != otherRow:
+                return k
+        return min(len(self), len(other)) if len(self) != len(other) else sys.maxsize
+
+    def arrays(self):
+        return (self.op, self.stationType, self.rd, self.rs, self.rt, self.imm, self.lineIndex)
+
+    def toBytes(self) -> bytes:
+        body = b"".join(a.tobytes() for a in self.arrays())
+        text = "\n".join(self.text).encode("utf-8")
+        return CACHE_MAGIC + struct.pack("<HI", CACHE_VERSION, len(self)) + body + text
+
+    @classmethod
+    def fromBytes(cls, data: bytes) -> "DecodedProgram":
+        if data[:4] != CACHE_MAGIC:
+            raise ValueError("Not a decoded program cache file")
+        version, n = struct.unpack_from("<HI", data, 4)
+        if version != CACHE_VERSION:
+            raise ValueError(f"Unsupported decode cache version {version}")
+
+        decoded = cls()
+        offset = 10
+        for a in decoded.arrays():
+            size = a.itemsize * n
+            a.frombytes(data[offset:offset + size])
+            offset += size
+        decoded.text = data[offset:].decode("utf-8").split("\n") if n else []
+        return decoded
+
+def decodeInstructions(instructions: Sequence) -> DecodedProgram:
+    # Accepts parsed tomasulo.Instruction objects
+    decoded = DecodedProgram(len(instructions))
+    for k, inst in enumerate(instructions):
+        op = OPCODE_OF[inst.op_str]
+        decoded.op[k] = op
+        decoded.stationType[k] = STATION_TYPE[op]
+        decoded.rd[k] = inst.rd
+        decoded.rs[k] = inst.rs
+        decoded.rt[k] = inst.rt
+        decoded.imm[k] = inst.imm
+        decoded.lineIndex[k] = inst.index
+        decoded.text[k] = inst.inst
+    return decoded
+
+def cacheDir() -> Optional[str]:
+    # An empty TOMASULO_DECODE_CACHE disables the on-disk cache
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path is None:
+        path = os.path.join(os.path.expanduser("~"), ".cache", "tomasulo_sim", "decoded")
+    return path or None
+
+def cacheKey(source: bytes) -> str:
+    h = hashlib.sha256(source)
+    h.update(f"v{CACHE_VERSION}-{sys.byteorder}".encode())
+    return h.hexdigest()
+
+def loadProgram(instFile: str, parse: Callable[[str], Sequence]) -> DecodedProgram:
+    # Decode instFile, reusing a cached decode of identical file content when available
+    with open(instFile, "rb") as f:
+        source = f.read()
+
+    directory = cacheDir()
+    path = os.path.join(directory, cacheKey(source) + ".bin") if directory else None
+    if path:
+        try:
+            with open(path, "rb") as f:
+                return DecodedProgram.fromBytes(f.read())
+        except (OSError, ValueError, struct.error):
+            pass
+
+    decoded = decodeInstructions(parse(instFile))
+    if path:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmpPath = f"{path}.{os.getpid()}.tmp"
+            with open(tmpPath, "wb") as f:
+                f.write(decoded.toBytes())
+            os.replace(tmpPath, path)
+        except OSError:
+            pass  # The cache is an optimization only
+    return decoded
@@ -0,0 +1,230 @@
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmark import WORKLOADS, scaledHardware
+from events import NullSink
+from tomasulo import Instruction, Tomasulo
+
+# Fixed programs and hardware for checking the engines that duplicate the generic engine's cycle
+# against it. Every run must match the generic run's metrics, final registers, PC and memory
+# exactly. `python main.py --verify` runs all checks; run it after changing any engine.
+
+HardwareRows = List[Optional[List[int]]]
+Outcome = Dict[str, object]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PROGRAM_FILES = ("test_branches.txt", "test_call_ret.txt", "test_custom.txt", "test_cycles.txt",
+                 "test_data_hazards.txt", "test_hardware_units.txt", "test_memory.txt", "test_memory_init.txt",
+                 "test_simple_arithmetic.txt", "test_simple_branch.txt", "test_simple_memory.txt", "inst.txt",
+                 "instructions.txt")
+HARDWARE_FILES = ("hardware.txt", "custom_hardware.txt")
+MEMORY_FILE = "memory.txt"
+WORKLOAD_SIZE = 12
+CHECKPOINT_INTERVAL = 20
+# Loops look at their whole body within a few cycles, so edits to them resume at the start. The
+# resume check runs the program files and long straight-line bodies of the workloads instead, which
+# give edits late in the program late checkpoints to resume from.
+STRAIGHT_LINE_WORKLOADS = ("rawChain", "independentAlu", "memoryMix", "branchLoop")
+STRAIGHT_LINE_SIZE = 150
+
+# Edits to every program for the resume check, as functions of the program's lines
+EDITS: List[Tuple[str, Callable[[List[str]], List[str]]]] = [
+    ("replaceLast", lambda lines: lines[:-1] + ["ADD R7, R7, R1"]),
+    ("append", lambda lines: lines + ["NOR R6, R2, R3", "STORE R6, 5(R0)"]),
+    ("insertMiddle", lambda lines: lines[:len(lines) // 2] + ["SUB R4, R4, R1"] + lines[len(lines) // 2:]),
+    ("replaceLate", lambda lines: lines[:len(lines) * 2 // 3] + ["MUL R5, R5, R2"] + lines[len(lines) * 2 // 3 + 1:]),
+]
+
+# Extra configurations: wider issue, long and zero-cycle phases, and absent station types
+FIXED_HARDWARE: List[Tuple[str, HardwareRows]] = [
+    ("default", Tomasulo.defaultHardware),
+    ("width2", Tomasulo.defaultHardware + [[2]]),
+    ("scale2Width4", scaledHardware(2) + [[4]]),
+    ("longLatency", [[1, 4, 2], [1, 3, 3], [1, 2], [1, 3], [1, 5], [1, 3], [1, 2], [1, 12]]),
+    ("zeroCycle", [[2, 0, 0], [2, 1, 0], [1, 1], [1, 0], [2, 0], [1, 1], [1, 1], [1, 3]]),
+    ("noMulNoCall", [[2, 2, 1], [2, 2, 1], [1, 1], None, [3, 2], [1, 2], [1, 1], None]),
+]
+
+class Cases:
+    # Every program on every configuration, with the generic engine's outcome for each run
+    def __init__(self):
+        self.programs: List[Tuple[str, List[Instruction]]] = []
+        for name in PROGRAM_FILES:
+            self.programs.append((name, Tomasulo.parseInstFile(os.path.join(REPO_DIR, name))))
+        for name, workload in WORKLOADS.items():
+            self.programs.append((name, [Instruction(text, k) for k, text in enumerate(workload(WORKLOAD_SIZE))]))
+        self.hardware = list(FIXED_HARDWARE)
+        for name in HARDWARE_FILES:
+            self.hardware.append((name, Tomasulo.parseHardwareFile(os.path.join(REPO_DIR, name))))
+        loader = Tomasulo.fromConfig([], Tomasulo.defaultHardware, 0)
+        loader.loadMemory(os.path.join(REPO_DIR, MEMORY_FILE))
+        self.memory = loader.mem
+        self.expected: Dict[Tuple[str, str], Outcome] = {}
+        for programName, program in self.programs:
+            for hardwareName, rows in self.hardware:
+                self.expected[programName, hardwareName] = outcome(self.simulate(program, rows))
+
+    def simulate(self, program: List[Instruction], rows: HardwareRows,
+                 configure: Optional[Callable[[Tomasulo], None]] = None, engine: type = Tomasulo) -> Tomasulo:
+        sim = engine.fromConfig(program, rows, 0)
+        sim.mem[:] = self.memory
+        sim.setSink(NullSink())
+        if configure:
+            configure(sim)
+        sim.initiateRunning()
+        return sim
+
+def outcome(sim: Tomasulo) -> Outcome:
+    result: Outcome = dict(sim.metrics())
+    result.update(registers=list(sim.registers), pc=sim.pc, memory=list(sim.mem))
+    return result
+
+def differences(expected: Outcome, actual: Outcome) -> List[str]:
+    found = []
+    for field, value in expected.items():
+        other = actual.get(field)
+        if other == value:
+            continue
+        if field == "memory" and other is not None:
+            address = next(a for a, (x, y) in enumerate(zip(value, other)) if x != y)
+            found.append(f"memory[{address}] {value[address]} != {other[address]}")
+        else:
+            found.append(f"{field} {value} != {other}")
+    return found
+
+class Check:
+    # Counts compared runs and reports each mismatch as "<check>: <program> on <hardware>: ..."
+    def __init__(self, name: str, report: Callable[[str], None]):
+        self.name = name
+        self.report = report
+        self.compared = 0
+        self.mismatches = 0
+
+    def compare(self, programName: str, hardwareName: str, expected: Outcome, actual: Outcome):
+        self.compared += 1
+        found = differences(expected, actual)
+        if found:
+            self.mismatches += 1
+            shown = "; ".join(found[:4]) + ("; ..." if len(found) > 4 else "")
+            self.report(f"Mismatch: {self.name}: {programName} on {hardwareName}: {shown}")
+
+    def skip(self, reason: str) -> int:
+        self.report(f"{self.name}: skipped, {reason}")
+        return 0
+
+    def finish(self) -> int:
+        self.report(f"{self.name}: {self.compared} runs compared, {self.mismatches} mismatched")
+        return self.mismatches
+
+def checkEventSkipping(cases: Cases, report: Callable[[str], None]) -> int:
+    check = Check("event skipping", report)
+    for programName, program in cases.programs:
+        for hardwareName, rows in cases.hardware:
+            sim = cases.simulate(program, rows, lambda s: setattr(s, "eventSkipping", True))
+            check.compare(programName, hardwareName, cases.expected[programName, hardwareName], outcome(sim))
+    return check.finish()
+
+def checkBatch(cases: Cases, report: Callable[[str], None]) -> int:
+    check = Check("batch engine", report)
+    try:
+        from batch import BatchTomasulo, supportsConfig
+    except ImportError:
+        return check.skip("numpy is not installed")
+    batched = [(name, rows) for name, rows in cases.hardware if supportsConfig(rows)]
+    for programName, program in cases.programs:
+        engine = BatchTomasulo(program, [rows for _, rows in batched], 0, cases.memory)
+        engine.run()
+        for b, ((hardwareName, _), metrics) in enumerate(zip(batched, engine.metrics())):
+            actual: Outcome = dict(metrics)
+            actual.update(registers=engine.registers[b].tolist(), pc=int(engine.pc[b]), memory=engine.memoryOf(b).tolist())
+            check.compare(programName, hardwareName, cases.expected[programName, hardwareName], actual)
+    return check.finish()
+
+def checkSpecialized(cases: Cases, report: Callable[[str], None]) -> int:
+    from specialize import TEMPLATE_HASH, templateHash
+
+    check = Check("specialized cycle", report)
+    currentHash = templateHash(Tomasulo)
+    if currentHash != TEMPLATE_HASH:
+        report(f"Mismatch: {check.name}: Tomasulo.{', '.join(Tomasulo.specializedMethods)} changed since the "
+               f"templates in specialize.py were written; update them and set TEMPLATE_HASH to {currentHash}")
+        return 1
+    for eventSkipping in (False, True):
+        def configure(sim: Tomasulo):
+            sim.specializeCycle = True
+            sim.eventSkipping = eventSkipping
+        for programName, program in cases.programs:
+            for hardwareName, rows in cases.hardware:
+                sim = cases.simulate(program, rows, configure)
+                actual = outcome(sim)
+                actual["specialized"] = "nextCycle" in vars(sim)  # False when the generic cycle ran
+                expected = dict(cases.expected[programName, hardwareName], specialized=True)
+                check.compare(programName, hardwareName + (" with event skipping" if eventSkipping else ""),
+                              expected, actual)
+    return check.finish()
+
+def checkEditResume(cases: Cases, report: Callable[[str], None]) -> int:
+    # A checkpointed run, edited and resumed with editProgram, against a fresh run of the edited program
+    check = Check("edit resume", report)
+    programs = [(name, [inst.inst for inst in program]) for name, program in cases.programs if name in PROGRAM_FILES]
+    for name in STRAIGHT_LINE_WORKLOADS:
+        programs.append((name + "Body", WORKLOADS[name](STRAIGHT_LINE_SIZE)[:-1]))
+    fullRuns = 0
+    resumedCycles = 0
+    with tempfile.TemporaryDirectory() as directory:
+        editedFile = os.path.join(directory, "edited.txt")
+        for programName, lines in programs:
+            program = [Instruction(text, k) for k, text in enumerate(lines)]
+            for editName, edit in EDITS:
+                edited = edit(lines)
+                with open(editedFile, "w") as f:
+                    f.write("\n".join(edited) + "\n")
+                editedProgram = [Instruction(text, k) for k, text in enumerate(edited)]
+                for hardwareName, rows in cases.hardware:
+                    sim = cases.simulate(program, rows, lambda s: s.enableCheckpoints(CHECKPOINT_INTERVAL))
+                    cycle = sim.editProgram(editedFile)
+                    if not cycle:
+                        fullRuns += 1  # Changed before the first checkpoint; callers start a full run
+                        continue
+                    resumedCycles += cycle - 1
+                    sim.initiateRunning()
+                    expected = outcome(cases.simulate(editedProgram, rows))
+                    check.compare(f"{programName} ({editName})", hardwareName, expected, outcome(sim))
+    if check.compared:
+        report(f"{check.name}: {fullRuns} edits needed a full run, the others skipped "
+               f"{resumedCycles / check.compared:.0f} cycles on average")
+    return check.finish()
+
+def checkReplay(cases: Cases, report: Callable[[str], None]) -> int:
+    # Recording a control trace must not change the run, and replaying the trace on the hardware it
+    # was recorded on must reproduce the run's metrics. Replay computes no values, so registers and
+    # memory are not compared. A run cut off by its cycle budget is left out: its trace ends at the
+    # last committed instruction, where the replay stops.
+    from trace_replay import RecordingTomasulo, ReplayTomasulo
+
+    recording = Check("control trace recording", report)
+    replay = Check("control trace replay", report)
+    unfinished = 0
+    for programName, program in cases.programs:
+        for hardwareName, rows in cases.hardware:
+            expected = cases.expected[programName, hardwareName]
+            recorder = cases.simulate(program, rows, engine=RecordingTomasulo)
+            recording.compare(programName, hardwareName, expected, outcome(recorder))
+            if not recorder.isFinished():
+                unfinished += 1
+                continue
+            replayer = cases.simulate(program, rows, lambda s: s.loadTrace(recorder.controlTrace), ReplayTomasulo)
+            metrics = replayer.metrics()
+            replay.compare(programName, hardwareName, {field: expected[field] for field in metrics}, metrics)
+    report(f"{replay.name}: {unfinished} runs hit the cycle budget and were not replayed")
+    return recording.finish() + replay.finish()
+
+CHECKS: List[Callable[[Cases, Callable[[str], None]], int]] = [checkEventSkipping, checkBatch, checkSpecialized,
+                                                               checkEditResume, checkReplay]
+
+def runChecks(report: Callable[[str], None] = print) -> int:
+    # Returns the number of mismatched runs over all checks
+    cases = Cases()
+    report(f"{len(cases.programs)} programs on {len(cases.hardware)} hardware configurations")
+    return sum(check(cases, report) for check in CHECKS)
@@ -0,0 +1,127 @@
+import struct
+import sys
+from enum import IntEnum
+from typing import IO, Iterator, List, Optional, Tuple
+
+class Verbosity(IntEnum):
+    QUIET = 0    # nothing at all
+    SUMMARY = 1  # final tables, metrics and warnings
+    EVENTS = 2   # one line per issue / execute / write-back event
+    DEBUG = 3    # periodic debug reports as well
+
+# Pipeline event kinds
+EV_ISSUE = 0
+EV_EXEC_START = 1
+EV_EXEC_END = 2
+EV_ADDR_DONE = 3
+EV_LOAD_DONE = 4
+EV_STORE_DONE = 5
+EV_WRITEBACK = 6
+EV_WRITEBACK_STORE = 7
+EV_BEQ_COMPARE = 8  # values: vj, vk, result
+
+EVENT_TEMPLATES = [
+    "Cycle {cycle}: Issued {inst}",
+    "Cycle {cycle}: Starting execution of {inst}",
+    "Cycle {cycle}: Instruction {inst} completed execution",
+    "Cycle {cycle}: Load address calculation complete for {inst}",
+    "Cycle {cycle}: Load complete for {inst}",
+    "Cycle {cycle}: Store complete for {inst}",
+    "Cycle {cycle}: Writeback {inst}",
+    "Cycle {cycle}: Writeback STORE {inst}",
+    "Cycle {cycle}: BEQ comparison: R{rs}={v1}, R{rt}={v2}, result={v3}",
+]
+
+class EventSink:
+    # The simulator only calls event() when level >= EVENTS and write() when level is at least
+    # the report's level, so a sink never pays for formatting it does not want
+    level = Verbosity.QUIET
+
+    def attach(self, sim):
+        pass
+
+    def event(self, kind: int, cycle: int, instIndex: int, v1: int = 0, v2: int = 0, v3: int = 0):
+        pass
+
+    def write(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class NullSink(EventSink):
+    pass
+
+class TextSink(EventSink):
+    # Buffers formatted lines and hands them to the stream in large chunks
+    def __init__(self, stream: Optional[IO[str]] = None, level: Verbosity = Verbosity.DEBUG, bufferLines: int = 4096):
+        self.stream = stream
+        self.level = level
+        self.bufferLines = bufferLines
+        self.lines: List[str] = []
+        self.sim = None
+
+    def attach(self, sim):
+        self.sim = sim
+
+    def event(self, kind: int, cycle: int, instIndex: int, v1: int = 0, v2: int = 0, v3: int = 0):
+        d = self.sim.decoded
+        self.write(EVENT_TEMPLATES[kind].format(cycle=cycle, inst=d.text[instIndex], rs=d.rs[instIndex],
+                                                rt=d.rt[instIndex], v1=v1, v2=v2, v3=v3))
+
+    def write(self, text: str):
+        self.lines.append(text)
+        if len(self.lines) >= self.bufferLines:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+BINARY_MAGIC = b"TEVT"
+BINARY_RECORD = struct.Struct("<BIIiii")
+
+class BinarySink(EventSink):
+    # Fixed-size records (kind, cycle, instIndex, v1, v2, v3); reports are not recorded
+    def __init__(self, path: str, bufferRecords: int = 8192):
+        self.level = Verbosity.EVENTS
+        self.file = open(path, "wb")
+        self.file.write(BINARY_MAGIC)
+        self.bufferRecords = bufferRecords
+        self.records = bytearray()
+        self.pending = 0
+
+    def event(self, kind: int, cycle: int, instIndex: int, v1: int = 0, v2: int = 0, v3: int = 0):
+        self.records += BINARY_RECORD.pack(kind, cycle, instIndex, v1, v2, v3)
+        self.pending += 1
+        if self.pending >= self.bufferRecords:
+            self.flush()
+
+    def write(self, text: str):
+        pass
+
+    def flush(self):
+        if self.records:
+            self.file.write(self.records)
+            self.records = bytearray()
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def readBinaryEvents(path: str) -> Iterator[Tuple[int, int, int, int, int, int]]:
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary event trace")
+        while True:
+            chunk = f.read(BINARY_RECORD.size * 4096)
+            if not chunk:
+                break
+            yield from BINARY_RECORD.iter_unpack(chunk)
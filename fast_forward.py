@@ -0,0 +1,101 @@
+import sys
+from typing import Dict, Optional
+
+from reservation_station import ReservationStation
+from decoder import OP_LOAD, OP_STORE, OP_BEQ, OP_CALL, OP_RET
+from events import Verbosity
+from tomasulo import Tomasulo
+
+# Functional runs with no end of their own (up to a PC that may never come, or to the end of the
+# program) stop after this many instructions per cycle of the detailed cycle budget: 1,000,000
+# for the default 1000 cycles. A run without a cycle limit has no functional limit either.
+FUNCTIONAL_INSTRUCTIONS_PER_CYCLE = 1000
+
+def functionalBudget(maxCycles: int) -> int:
+    return maxCycles * FUNCTIONAL_INSTRUCTIONS_PER_CYCLE
+
+def interpret(sim: Tomasulo, maxInstructions: int = 0, untilPc: Optional[int] = None) -> int:
+    # Execute from sim.pc directly on the simulator's registers and memory, with no timing.
+    # Operations, addresses and return targets go through the engine's own methods, and like
+    # the engine a LOAD leaves its destination register alone. Stops after maxInstructions
+    # (0 for no limit), when the PC reaches untilPc, or when it leaves the program.
+    # Returns the number of instructions executed.
+    d = sim.decoded
+    ops, rds, rss, rts, imms = d.op, d.rd, d.rs, d.rt, d.imm
+    regs = sim.registers
+    opLogic = sim.opLogic
+    scratch = ReservationStation("interp", 0, 0, 0)
+    limit = maxInstructions or sys.maxsize
+    n = len(d)
+    pc = sim.pc
+    count = 0
+
+    traceEvents = sim.traceEvents
+    sim.traceEvents = False  # No pipeline events outside the detailed region
+    try:
+        while pc < n and pc != untilPc and count < limit:
+            op = ops[pc]
+            scratch.instIndex = pc
+            scratch.vj = regs[rss[pc]]
+            scratch.vk = regs[rts[pc]]
+            if op == OP_LOAD:
+                pc += 1
+            elif op == OP_STORE:
+                scratch.addr = imms[pc]
+                sim.writeMem(sim.effectiveAddress(scratch), scratch.vk & 0xFFFF)
+                pc += 1
+            elif op == OP_BEQ:
+                opLogic[op](sim, scratch)
+                pc += 1 + imms[pc] if scratch.result else 1
+            elif op == OP_CALL:
+                opLogic[op](sim, scratch)
+                regs[1] = scratch.result
+                pc += 1 + imms[pc]
+            elif op == OP_RET:
+                pc = sim.returnAddress(scratch)
+            else:
+                opLogic[op](sim, scratch)
+                if rds[pc] != 0:
+                    regs[rds[pc]] = scratch.result & 0xFFFF
+                pc += 1
+            count += 1
+    finally:
+        sim.traceEvents = traceEvents
+        sim.pc = pc
+    return count
+
+def runSampled(sim: Tomasulo, skipInstructions: int = 0, untilPc: Optional[int] = None,
+               detailedInstructions: int = 0, afterInstructions: Optional[int] = None) -> Dict[str, int]:
+    # Fast-forward functionally (skipInstructions, up to untilPc, or both), then simulate in
+    # detail. With detailedInstructions > 0 the detailed region drains after that many
+    # instructions, and afterInstructions then continues functionally (0 for the rest of the
+    # program). Registers and memory carry over exactly each way. Open-ended functional runs stop
+    # at the functional budget.
+    budget = functionalBudget(sim.maxCycles)
+    truncated = []
+    before = 0
+    if skipInstructions or untilPc is not None:
+        before = interpret(sim, skipInstructions or budget, untilPc)
+        if not skipInstructions and before == budget and sim.pc != untilPc and sim.pc < len(sim.decoded):
+            truncated.append(f"before reaching PC {untilPc}")
+
+    if detailedInstructions:
+        sim.maxInstructions = detailedInstructions
+        sim.drainAfterBudget = True
+    sim.initiateRunning()
+
+    after = 0
+    if afterInstructions is not None and detailedInstructions and not sim.busyStations and not sim.stopRequested:
+        after = interpret(sim, afterInstructions or budget)
+        if not afterInstructions and after == budget and sim.pc < len(sim.decoded):
+            truncated.append("before the end of the program")
+
+    if sim.sink.level >= Verbosity.SUMMARY and (before or after):
+        sim.sink.write(f'\n<span style="color: #00ff00;">Functional Instructions: </span>'
+                       f'<span style="color: #ff69b4;">{before} before, {after} after the detailed region</span>')
+        for where in truncated:
+            sim.sink.write(f'\n<span style="color: #00ff00;">Functional Budget: </span>'
+                           f'<span style="color: #ff69b4;">stopped after {budget} instructions {where} '
+                           f'(--max-cycles 0 removes the limit)</span>')
+        sim.sink.flush()
+    return {"before": before, "detailed": sim.wbInsts, "after": after}
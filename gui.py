@@ -1,13 +1,56 @@
+import os
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QFileDialog, 
                             QTextEdit, QSpinBox, QRadioButton, QButtonGroup,
                             QGroupBox, QScrollArea, QTableWidget, QTableWidgetItem,
                             QSizePolicy)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QPalette, QColor, QFont
+from collections import deque
+from events import NullSink, TextSink
 from tomasulo import Tomasulo
 
+UI_REFRESH_HZ = 10          # Upper bound on output/progress refreshes per second
+MAX_LINES_PER_REFRESH = 2000  # Keeps a single refresh from stalling the event loop
+CHECKPOINT_INTERVAL = 50    # Cycles between checkpoints kept for stepping back through a run
+
+class QueuedTextSink(TextSink):
+    # Formats on the worker thread and hands finished chunks to the UI thread through a deque
+    def __init__(self):
+        super().__init__(bufferLines=256)
+        self.chunks = deque()
+
+    def flush(self):
+        if self.lines:
+            self.chunks.append(self.lines)
+            self.lines = []
+
+    def drain(self, maxLines):
+        lines = []
+        while self.chunks and len(lines) < maxLines:
+            lines.extend(self.chunks.popleft())
+        return lines
+
+class SimulationWorker(QObject):
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, simulator):
+        super().__init__()
+        self.simulator = simulator
+
+    def run(self):
+        try:
+            self.simulator.initiateRunning()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit()
+
+    def cancel(self):
+        self.simulator.requestStop()
+
 class TomasuloGUI(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -161,11 +204,40 @@ class TomasuloGUI(QMainWindow):
         mem_layout.addWidget(self.mem_file_btn)
         input_layout.addLayout(mem_layout)
         
-        # Run button
+        # Run / cancel buttons
+        run_layout = QHBoxLayout()
         self.run_btn = QPushButton("Run Simulation")
         self.run_btn.setMinimumHeight(40)
         self.run_btn.clicked.connect(self.run_simulation)
-        input_layout.addWidget(self.run_btn)
+        run_layout.addWidget(self.run_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setMinimumHeight(40)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_simulation)
+        run_layout.addWidget(self.cancel_btn)
+        input_layout.addLayout(run_layout)
+
+        self.progress_label = QLabel("")
+        input_layout.addWidget(self.progress_label)
+
+        # Cycle navigation, available once a run has finished
+        nav_layout = QHBoxLayout()
+        self.step_back_btn = QPushButton("◀ Step Back")
+        self.step_back_btn.clicked.connect(lambda: self.show_cycle(self.current_cycle - 1))
+        nav_layout.addWidget(self.step_back_btn)
+        self.step_fwd_btn = QPushButton("Step Forward ▶")
+        self.step_fwd_btn.clicked.connect(lambda: self.show_cycle(self.current_cycle + 1))
+        nav_layout.addWidget(self.step_fwd_btn)
+        nav_layout.addWidget(QLabel("Cycle:"))
+        self.cycle_spin = QSpinBox()
+        self.cycle_spin.setRange(0, 0)
+        nav_layout.addWidget(self.cycle_spin)
+        self.jump_btn = QPushButton("Jump")
+        self.jump_btn.clicked.connect(lambda: self.show_cycle(self.cycle_spin.value()))
+        nav_layout.addWidget(self.jump_btn)
+        input_layout.addLayout(nav_layout)
+        self.current_cycle = 0
+        self.set_navigation_enabled(False)
         
         input_group.setLayout(input_layout)
         self.layout.addWidget(input_group)
@@ -203,6 +275,16 @@ class TomasuloGUI(QMainWindow):
         self.hw_file = ""
         self.mem_file = ""
         self.simulator = None
+        self.run_inputs = None  # simulation_inputs() of the last run
+        self.can_resume = False  # The last run finished, so its checkpoints can serve an edited program
+        self.sink = None
+        self.worker = None
+        self.worker_thread = None
+
+        # Output and progress are pulled from the worker at a capped rate
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000 // UI_REFRESH_HZ)
+        self.refresh_timer.timeout.connect(self.refresh_output)
         
         # Redirect stdout to our text widget
         sys.stdout = self
@@ -225,7 +307,7 @@ class TomasuloGUI(QMainWindow):
             self.hw_file = file_name
             
     def select_mem_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "Select Memory File", "", "Text Files (*.txt)")
+        file_name, _ = QFileDialog.getOpenFileName(self, "Select Memory File", "", "Memory Files (*.txt *.bin)")
         if file_name:
             self.mem_file = file_name
             
@@ -254,33 +336,132 @@ class TomasuloGUI(QMainWindow):
         if not self.inst_file:
             self.output_text.append("Error: Please select an instructions file")
             return
+        if self.worker_thread is not None:
+            return
             
         try:
-            # Create simulator instance
-            self.simulator = Tomasulo(
-                self.inst_file,
-                self.default_hw_radio.isChecked(),
-                self.hw_file,
-                self.pc_spin.value()
-            )
-            
-            # Initialize memory if requested
-            if self.mem_init_radio.isChecked() and self.mem_file:
-                self.simulator.readMem(self.mem_file)
-                
-            # Show instruction table
-            self.inst_table.setVisible(True)
-            self.misprediction_label.setVisible(True)
-            
-            # Run simulation
-            self.simulator.initiateRunning()
-            
-            # Update displays
-            self.update_instruction_table()
-            self.updateReservationStations()
-            
+            inputs = self.simulation_inputs()
+            resume_cycle = 0
+            # When only the program changed, continue the last run from its latest checkpoint
+            # that the edit cannot have affected
+            if self.simulator is not None and self.can_resume and inputs == self.run_inputs:
+                resume_cycle = self.simulator.editProgram(self.inst_file)
+
+            if not resume_cycle:
+                # Create simulator instance
+                self.simulator = Tomasulo(
+                    self.inst_file,
+                    self.default_hw_radio.isChecked(),
+                    self.hw_file,
+                    self.pc_spin.value()
+                )
+
+                # Initialize memory if requested
+                if self.mem_init_radio.isChecked() and self.mem_file:
+                    self.simulator.loadMemory(self.mem_file)
         except Exception as e:
             self.output_text.append(f"Error: {str(e)}")
+            return
+        self.run_inputs = inputs
+        self.can_resume = False
+        if resume_cycle > 1:
+            self.output_text.append(f"Program edited: resuming from cycle {resume_cycle}, "
+                                    f"cycles before it are unchanged by the edit")
+
+        self.sink = QueuedTextSink()
+        self.simulator.setSink(self.sink)
+        self.simulator.enableCheckpoints(CHECKPOINT_INTERVAL)
+        self.set_navigation_enabled(False)
+
+        # Show instruction table
+        self.inst_table.setVisible(True)
+        self.misprediction_label.setVisible(True)
+
+        # Run simulation off the UI thread
+        self.worker = SimulationWorker(self.simulator)
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.on_simulation_finished)
+        self.worker.failed.connect(self.on_simulation_failed)
+        self.worker_thread.finished.connect(self.on_worker_thread_finished)
+
+        self.run_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.refresh_timer.start()
+        self.worker_thread.start()
+
+    def simulation_inputs(self):
+        # Everything besides the program that a run depends on; changing any of it needs a full rerun
+        hardware = None if self.default_hw_radio.isChecked() else Tomasulo.parseHardwareFile(self.hw_file)
+        memory = None
+        if self.mem_init_radio.isChecked() and self.mem_file:
+            stat = os.stat(self.mem_file)
+            memory = (self.mem_file, stat.st_mtime_ns, stat.st_size)
+        return hardware, self.pc_spin.value(), memory
+
+    def cancel_simulation(self):
+        if self.worker is not None:
+            self.cancel_btn.setEnabled(False)
+            self.worker.cancel()
+
+    def refresh_output(self):
+        lines = self.sink.drain(MAX_LINES_PER_REFRESH) if self.sink else []
+        if lines:
+            self.output_text.append("\n".join(lines))
+        if self.simulator:
+            self.progress_label.setText(
+                f"Cycle {self.simulator.cycle - 1}, "
+                f"{self.simulator.wbInsts} instructions completed"
+            )
+        # Once the worker is done, keep refreshing until its output is fully shown
+        if self.worker_thread is None and not (self.sink and self.sink.chunks):
+            self.refresh_timer.stop()
+            self.run_btn.setEnabled(True)
+
+    def on_simulation_finished(self):
+        self.worker_thread.quit()
+
+        # Update displays
+        self.update_instruction_table()
+        self.updateReservationStations()
+
+        # Replays for cycle navigation should not add to the output log
+        self.simulator.setSink(NullSink())
+        self.current_cycle = self.simulator.runCycles
+        self.cycle_spin.setRange(0, self.simulator.runCycles)
+        self.cycle_spin.setValue(self.current_cycle)
+        self.set_navigation_enabled(True)
+        self.can_resume = True
+
+    def set_navigation_enabled(self, enabled):
+        for widget in (self.step_back_btn, self.step_fwd_btn, self.cycle_spin, self.jump_btn):
+            widget.setEnabled(enabled)
+
+    def show_cycle(self, cycle):
+        if not self.simulator or self.worker_thread is not None:
+            return
+        self.simulator.seekCycle(cycle)
+        self.current_cycle = self.simulator.cycle - 1
+        self.cycle_spin.setValue(self.current_cycle)
+        self.progress_label.setText(
+            f"Showing cycle {self.current_cycle} of {self.simulator.runCycles}, "
+            f"{self.simulator.wbInsts} instructions completed"
+        )
+        self.update_instruction_table()
+        self.updateReservationStations()
+
+    def on_simulation_failed(self, message):
+        self.worker_thread.quit()
+        self.output_text.append(f"Error: {message}")
+
+    def on_worker_thread_finished(self):
+        self.worker_thread.deleteLater()
+        self.worker.deleteLater()
+        self.worker_thread = None
+        self.worker = None
+        self.cancel_btn.setEnabled(False)
+        self.refresh_output()
 
     def setupReservationStations(self):
         # Create table for reservation stations
@@ -302,12 +483,12 @@ class TomasuloGUI(QMainWindow):
         # Add new items from simulator
         row = 0
         for stationType in range(self.simulator.nStationTypes):
-            for i in range(self.simulator.stations[stationType]):
-                station = self.simulator.reservationStations[stationType][i]
+            for station in self.simulator.stations[stationType]:
+                opStr = self.simulator.program[station.instIndex].op_str if station.oper else ""
                 self.rsTable.insertRow(row)
                 self.rsTable.setItem(row, 0, QTableWidgetItem(station.name))
                 self.rsTable.setItem(row, 1, QTableWidgetItem(str(station.busy)))
-                self.rsTable.setItem(row, 2, QTableWidgetItem(station.op_str if station.op else ""))
+                self.rsTable.setItem(row, 2, QTableWidgetItem(opStr))
                 self.rsTable.setItem(row, 3, QTableWidgetItem(str(station.vj)))
                 self.rsTable.setItem(row, 4, QTableWidgetItem(str(station.vk)))
                 self.rsTable.setItem(row, 5, QTableWidgetItem(str(station.qj)))
@@ -0,0 +1,66 @@
+import csv
+import struct
+from typing import Iterator, Tuple
+
+# One record per retired dynamic instruction
+TRACE_FIELDS = ["seq", "instIndex", "issue", "execStart", "execEnd", "write"]
+TraceRecord = Tuple[int, int, int, int, int, int]
+
+TRACE_MAGIC = b"TRET"
+TRACE_RECORD = struct.Struct("<QIIIII")
+
+class TraceWriter:
+    # Fixed-size binary records, buffered so a long run streams to disk in large writes
+    def __init__(self, path: str, bufferRecords: int = 8192):
+        self.file = open(path, "wb")
+        self.file.write(TRACE_MAGIC)
+        self.bufferRecords = bufferRecords
+        self.records = bytearray()
+        self.pending = 0
+
+    def __call__(self, record: TraceRecord):
+        self.records += TRACE_RECORD.pack(*record)
+        self.pending += 1
+        if self.pending >= self.bufferRecords:
+            self.flush()
+
+    def flush(self):
+        if self.records:
+            self.file.write(self.records)
+            self.records = bytearray()
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class CsvTraceWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(TRACE_FIELDS)
+
+    def __call__(self, record: TraceRecord):
+        self.writer.writerow(record)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def openTraceWriter(path: str):
+    if path.endswith(".csv"):
+        return CsvTraceWriter(path)
+    return TraceWriter(path)
+
+def readTrace(path: str) -> Iterator[TraceRecord]:
+    with open(path, "rb") as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a binary instruction trace")
+        while True:
+            chunk = f.read(TRACE_RECORD.size * 4096)
+            if not chunk:
+                break
+            yield from TRACE_RECORD.iter_unpack(chunk)
@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from events import NullSink
+from tomasulo import Instruction, Tomasulo
+
+# Bump when the engine's results change so stale cache entries are never served
+CACHE_VERSION = 1
+# Server defaults: the largest cycle budget a job may ask for, and seconds a job may run
+DEFAULT_MAX_CYCLES = 1000000
+DEFAULT_JOB_TIMEOUT = 60.0
+
+class BadRequest(ValueError):
+    pass
+
+class JobTimeout(Exception):
+    pass
+
+def normalizeRequest(request: Dict[str, object], maxCycles: int = DEFAULT_MAX_CYCLES) -> Dict[str, object]:
+    # Canonical form of a job: blank program lines dropped, memory as sorted non-zero words, every
+    # option filled in. Requests that simulate the same thing normalize to the same job. Every job
+    # needs a cycle budget of at most maxCycles, so none can hold a worker forever.
+    if not isinstance(request, dict):
+        raise BadRequest("Request body must be a JSON object")
+    unknown = set(request) - {"program", "hardware", "memory", "pc", "maxCycles", "maxInstructions", "writebackPolicy"}
+    if unknown:
+        raise BadRequest(f"Unknown request fields: {', '.join(sorted(unknown))}")
+
+    program = request.get("program")
+    if isinstance(program, str):
+        program = program.splitlines()
+    if not isinstance(program, list) or not all(isinstance(line, str) for line in program):
+        raise BadRequest("program must be the instruction file's text or a list of lines")
+    program = [line.replace('\u00A0', ' ').strip() for line in program]
+    program = [line for line in program if line]
+
+    hardware = request.get("hardware") or Tomasulo.defaultHardware
+    if not isinstance(hardware, list) or not Tomasulo.nStationTypes <= len(hardware) <= Tomasulo.nStationTypes + 1 or \
+            not all(row is None or (isinstance(row, list) and row and all(isinstance(v, int) and v >= 0 for v in row))
+                    for row in hardware):
+        raise BadRequest(f"hardware must be {Tomasulo.nStationTypes} rows of [units, cycles(, addr cycles)] or null, "
+                         "plus an optional [issue width] row")
+
+    words: Dict[int, int] = {}
+    memory = request.get("memory") or []
+    if isinstance(memory, str):
+        memory = [line.split() for line in memory.splitlines() if len(line.split()) == 2]
+    try:
+        pairs = [(int(address), int(value) & 0xFFFF) for address, value in memory]
+    except (TypeError, ValueError):
+        raise BadRequest("memory must be memory file text or a list of [address, value] pairs")
+    for address, value in pairs:
+        if not 0 <= address < Tomasulo.memWords:
+            raise BadRequest(f"Memory address {address} out of range")
+        words[address] = value
+
+    job = {
+        "program": program,
+        "hardware": hardware,
+        "memory": sorted((address, value) for address, value in words.items() if value),
+        "pc": request.get("pc", 0),
+        "maxCycles": request.get("maxCycles", Tomasulo.defaultMaxCycles),
+        "maxInstructions": request.get("maxInstructions", 0),
+        "writebackPolicy": request.get("writebackPolicy", "programOrder"),
+    }
+    for field in ("pc", "maxCycles", "maxInstructions"):
+        if not isinstance(job[field], int) or job[field] < 0:
+            raise BadRequest(f"{field} must be a non-negative integer")
+    if not 1 <= job["maxCycles"] <= maxCycles:
+        raise BadRequest(f"maxCycles must be between 1 and this server's limit of {maxCycles}")
+    if job["writebackPolicy"] not in Tomasulo.writebackPriority:
+        raise BadRequest(f"writebackPolicy must be one of: {', '.join(Tomasulo.writebackPriority)}")
+    return job
+
+def jobKey(job: Dict[str, object]) -> str:
+    encoded = json.dumps([CACHE_VERSION, job], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def simulateJob(job: Dict[str, object], timeout: float = DEFAULT_JOB_TIMEOUT) -> Dict[str, object]:
+    # Runs in a worker process; bad programs or hardware surface as BadRequest, and a run still
+    # going after timeout seconds stops with JobTimeout, freeing the worker
+    try:
+        program = [Instruction(line, k) for k, line in enumerate(job["program"])]
+        sim = Tomasulo.fromConfig(program, job["hardware"], job["pc"])
+        sim.setWritebackPolicy(job["writebackPolicy"])
+    except (ValueError, IndexError, TypeError) as e:
+        raise BadRequest(str(e))
+    for address, value in job["memory"]:
+        sim.mem[address] = value
+    sim.maxCycles = job["maxCycles"]
+    sim.maxInstructions = job["maxInstructions"]
+    sim.eventSkipping = True
+    sim.setSink(NullSink())
+    deadline = time.perf_counter() + timeout
+    for step, _ in enumerate(sim.run()):
+        if step % 1024 == 0 and time.perf_counter() > deadline:
+            raise JobTimeout(f"Job stopped after {timeout:g} s at cycle {sim.cycle - 1}")
+    return {"metrics": sim.metrics(), "registers": list(sim.registers), "pc": sim.pc}
+
+class ResultCache:
+    # One JSON file per job key. Entries are kept in least recently used order, by file
+    # modification time across restarts, and the oldest are evicted past maxBytes.
+    def __init__(self, directory: str, maxBytes: int):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        self.sizes: "OrderedDict[str, int]" = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self.totalBytes = sum(self.sizes.values())
+        self.evictions = 0
+        self.evict()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        if key not in self.sizes:
+            return None
+        try:
+            with open(self.path(key)) as f:
+                result = json.load(f)
+            os.utime(self.path(key))
+        except (OSError, ValueError):
+            self.remove(key)  # Deleted or corrupted behind our back
+            return None
+        self.sizes.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict[str, object]):
+        data = json.dumps(result).encode()
+        temp = self.path(key) + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, self.path(key))
+        self.totalBytes += len(data) - self.sizes.pop(key, 0)
+        self.sizes[key] = len(data)
+        self.evict()
+
+    def remove(self, key: str):
+        self.totalBytes -= self.sizes.pop(key, 0)
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        while self.totalBytes > self.maxBytes and self.sizes:
+            self.remove(next(iter(self.sizes)))
+            self.evictions += 1
+
+class JobServer:
+    def __init__(self, cache: ResultCache, workers: Optional[int] = None, maxCycles: int = DEFAULT_MAX_CYCLES,
+                 jobTimeout: float = DEFAULT_JOB_TIMEOUT):
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.maxCycles = maxCycles
+        self.jobTimeout = jobTimeout
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.queue: "asyncio.Queue[Tuple[str, Dict[str, object], asyncio.Future]]" = asyncio.Queue()
+        self.inFlight: Dict[str, asyncio.Future] = {}
+        self.runners: List[asyncio.Task] = []
+        self.stats = {"requests": 0, "cacheHits": 0, "deduplicated": 0, "simulated": 0, "failed": 0, "timedOut": 0}
+
+    async def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Start the workers before any connection is open; forked later, they would inherit the
+        # client sockets and hold them open after the response
+        await asyncio.get_running_loop().run_in_executor(self.pool, os.getpid)
+        self.runners = [asyncio.create_task(self.runJobs()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for runner in self.runners:
+            runner.cancel()
+        await asyncio.gather(*self.runners, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    async def submit(self, request: Dict[str, object]) -> Tuple[str, str, Dict[str, object]]:
+        # Returns (key, source, result); source is "cache", "inFlight" or "simulated"
+        self.stats["requests"] += 1
+        job = normalizeRequest(request, self.maxCycles)
+        key = jobKey(job)
+        result = self.cache.get(key)
+        if result is not None:
+            self.stats["cacheHits"] += 1
+            return key, "cache", result
+
+        future = self.inFlight.get(key)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+            return key, "inFlight", await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.inFlight[key] = future
+        await self.queue.put((key, job, future))
+        return key, "simulated", await asyncio.shield(future)
+
+    async def runJobs(self):
+        # One runner per worker process, so jobs wait in the queue rather than inside the pool
+        loop = asyncio.get_running_loop()
+        while True:
+            key, job, future = await self.queue.get()
+            try:
+                result = await loop.run_in_executor(self.pool, simulateJob, job, self.jobTimeout)
+                self.cache.put(key, result)
+                self.stats["simulated"] += 1
+                future.set_result(result)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.stats["timedOut" if isinstance(e, JobTimeout) else "failed"] += 1
+                future.set_exception(e)
+            finally:
+                del self.inFlight[key]
+                self.queue.task_done()
+
+    def status(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "queued": self.queue.qsize(),
+            "inFlight": len(self.inFlight),
+            "workers": self.workers,
+            "maxCycles": self.maxCycles,
+            "jobTimeout": self.jobTimeout,
+            "cacheEntries": len(self.cache.sizes),
+            "cacheBytes": self.cache.totalBytes,
+            "cacheMaxBytes": self.cache.maxBytes,
+            "cacheEvictions": self.cache.evictions,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Minimal HTTP/1.1: one request per connection, JSON in and out
+        try:
+            status, body = await self.route(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, body = 400, {"error": "Malformed HTTP request"}
+        data = json.dumps(body).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  500: "Internal Server Error", 504: "Gateway Timeout"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def route(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, object]]:
+        method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        body = await reader.readexactly(length) if length else b""
+
+        if target == "/status":
+            return (200, self.status()) if method == "GET" else (405, {"error": "Use GET"})
+        if target == "/jobs":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            try:
+                key, source, result = await self.submit(json.loads(body or b"null"))
+            except (BadRequest, json.JSONDecodeError) as e:
+                return 400, {"error": str(e)}
+            except JobTimeout as e:
+                return 504, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": f"{type(e).__name__}: {e}"}
+            return 200, {"key": key, "source": source, "result": result}
+        if target.startswith("/jobs/") and method == "GET":
+            result = self.cache.get(target[len("/jobs/"):])
+            return (200, {"key": target[len("/jobs/"):], "source": "cache", "result": result}) if result is not None \
+                else (404, {"error": "No cached result for this key"})
+        return 404, {"error": f"Unknown endpoint {target}"}
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, socketPath: Optional[str] = None,
+                cacheDir: str = ".job_cache", cacheBytes: int = 256 << 20, workers: Optional[int] = None,
+                maxCycles: int = DEFAULT_MAX_CYCLES, jobTimeout: float = DEFAULT_JOB_TIMEOUT):
+    server = JobServer(ResultCache(cacheDir, cacheBytes), workers, maxCycles, jobTimeout)
+    await server.start()
+    if socketPath:
+        listener = await asyncio.start_unix_server(server.handle, path=socketPath)
+        address = f"unix:{socketPath}"
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        address = f"http://{host}:{listener.sockets[0].getsockname()[1]}"
+    print(f"Serving simulation jobs on {address} with {server.workers} workers, cache in {cacheDir}", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
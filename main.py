@@ -1,33 +1,532 @@
 import sys
+from events import TextSink, Verbosity
 from tomasulo import Tomasulo
-from gui import TomasuloGUI
-import tkinter as tk
+from trace_replay import ControlTrace, RecordingTomasulo, ReplayTomasulo, TraceMismatch, hardwareSignature
 
-def runSimulation(instructionFile: str, isDefaultHardware: bool, hardwareFile: str, pc: int):
-    simulator = Tomasulo(instructionFile, isDefaultHardware, hardwareFile, pc)
-    simulator.initiateRunning()
+def runSimulation(instructionFile: str, isDefaultHardware: bool, hardwareFile: str, pc: int, *, skipIdle: bool = False,
+                  verbosity: Verbosity = Verbosity.DEBUG, memFile: str = None, dumpMemFile: str = None,
+                  issueWidth: int = None, writebackPolicy: str = None, maxCycles: int = None,
+                  maxInstructions: int = None, traceFile: str = None, profile: bool = False,
+                  recordControlFile: str = None, replayControlFile: str = None, fastForward: int = 0,
+                  fastForwardTo: int = None, detailedInstructions: int = 0, resumeFunctional: int = None,
+                  specialize: bool = False):
+    engine = ReplayTomasulo if replayControlFile else RecordingTomasulo if recordControlFile else Tomasulo
+    try:
+        simulator = engine(instructionFile, isDefaultHardware, hardwareFile, pc)
+        if replayControlFile:
+            simulator.loadTrace(ControlTrace.load(replayControlFile))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if issueWidth:
+        simulator.setIssueWidth(issueWidth)
+    if writebackPolicy:
+        simulator.setWritebackPolicy(writebackPolicy)
+    if maxCycles is not None:
+        simulator.maxCycles = maxCycles
+    if maxInstructions is not None:
+        simulator.maxInstructions = maxInstructions
+    if profile:
+        simulator.enableProfiling()
+    simulator.specializeCycle = specialize
+    simulator.eventSkipping = skipIdle
+    simulator.setSink(TextSink(level=verbosity))
+    if memFile:
+        simulator.loadMemory(memFile)
+    if replayControlFile and simulator.trace.hardware != hardwareSignature(simulator):
+        print("Warning: the control trace was recorded on different hardware. The replay gives the timing of the "
+              "recorded instruction stream, which can differ from a full run on this hardware.")
+    run = simulator.initiateRunning
+    if fastForward or fastForwardTo is not None or detailedInstructions:
+        from fast_forward import runSampled
+        run = lambda: runSampled(simulator, fastForward, fastForwardTo, detailedInstructions, resumeFunctional)
+    try:
+        if traceFile:
+            from instruction_trace import openTraceWriter
+            writer = openTraceWriter(traceFile)
+            simulator.retireHook = writer
+            try:
+                run()
+            finally:
+                writer.close()
+        else:
+            run()
+    except TraceMismatch as e:
+        simulator.sink.flush()
+        print(f"Error: {e}")
+        sys.exit(1)
+    if dumpMemFile:
+        simulator.saveMemory(dumpMemFile)
+    if recordControlFile:
+        simulator.controlTrace.save(recordControlFile)
 
 def runGUI(instructionFile: str, isDefaultHardware: bool, hardwareFile: str, pc: int):
+    # Imported here so console runs and sweeps work without a GUI toolkit installed
+    from gui import TomasuloGUI
+    import tkinter as tk
+
     root = tk.Tk()
     app = TomasuloGUI(root, instructionFile, isDefaultHardware, hardwareFile, pc)
     root.mainloop()
 
+def takeValues(args, i):
+    # Collect the values following an option up to the next --option
+    values = []
+    while i < len(args) and not args[i].startswith("--"):
+        values.append(args[i])
+        i += 1
+    return values, i
+
+def runSweepCommand(args):
+    from sweep import runSweep, loadGrid
+
+    programs = []
+    hardware = []
+    memories = []
+    pcs = []
+    outFile = "sweep_results.csv"
+    jobs = None
+    batchSize = 0
+    specialize = False
+    maxCycles = Tomasulo.defaultMaxCycles
+    maxInstructions = 0
+
+    i = 0
+    while i < len(args):
+        if args[i] == "--specialize":
+            specialize = True
+            i += 1
+        elif args[i] == "--hardware-list":
+            files, i = takeValues(args, i + 1)
+            try:
+                hardware.extend((f, Tomasulo.parseHardwareFile(f)) for f in files)
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+        elif args[i] == "--grid":
+            if i + 1 >= len(args):
+                print("Error: --grid requires a file path")
+                sys.exit(1)
+            try:
+                hardware.extend(loadGrid(args[i + 1]))
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            i += 2
+        elif args[i] == "--mem":
+            files, i = takeValues(args, i + 1)
+            memories.extend(files)
+        elif args[i] == "--pc":
+            values, i = takeValues(args, i + 1)
+            try:
+                pcs.extend(int(v) for v in values)
+            except ValueError:
+                print("Error: PC value must be an integer")
+                sys.exit(1)
+        elif args[i] == "--out":
+            if i + 1 >= len(args):
+                print("Error: --out requires a file path")
+                sys.exit(1)
+            outFile = args[i + 1]
+            i += 2
+        elif args[i] == "--jobs":
+            try:
+                jobs = int(args[i + 1])
+                i += 2
+            except (IndexError, ValueError):
+                print("Error: --jobs requires an integer")
+                sys.exit(1)
+        elif args[i] == "--batch":
+            try:
+                batchSize = int(args[i + 1])
+                i += 2
+            except (IndexError, ValueError):
+                print("Error: --batch requires an integer")
+                sys.exit(1)
+            if batchSize < 1:
+                print("Error: Batch size must be at least 1")
+                sys.exit(1)
+        elif args[i] in ("--max-cycles", "--max-instructions"):
+            try:
+                budget = int(args[i + 1])
+            except (IndexError, ValueError):
+                print(f"Error: {args[i]} requires an integer")
+                sys.exit(1)
+            if budget < 0:
+                print(f"Error: {args[i]} cannot be negative")
+                sys.exit(1)
+            if args[i] == "--max-cycles":
+                maxCycles = budget
+            else:
+                maxInstructions = budget
+            i += 2
+        else:
+            programs.append(args[i])
+            i += 1
+
+    if not programs:
+        print("Error: At least one instruction file is required")
+        sys.exit(1)
+    if not hardware:
+        hardware.append(("default", Tomasulo.defaultHardware))
+
+    try:
+        nRuns = runSweep(programs, hardware, outFile, memories or [None], pcs or [0], jobs, batchSize,
+                         specialize, maxCycles, maxInstructions)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Sweep complete: {nRuns} runs written to {outFile}")
+
+def runBenchmarkCommand(args):
+    from benchmark import (WORKLOADS, runSuite, formatResult, saveBaseline, compareBaseline)
+
+    workloads = list(WORKLOADS)
+    sizes = [64]
+    scales = [1, 2, 4, 8]
+    instructions = 20000
+    repeat = 3
+    skipIdle = False
+    specialize = False
+    outFile = None
+    baselineFile = None
+    tolerance = 0.2
+
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] == "--workloads":
+                workloads, i = takeValues(args, i + 1)
+                unknown = [w for w in workloads if w not in WORKLOADS]
+                if unknown:
+                    print(f"Error: Unknown workloads {', '.join(unknown)}, expected: {', '.join(WORKLOADS)}")
+                    sys.exit(1)
+            elif args[i] == "--sizes":
+                values, i = takeValues(args, i + 1)
+                sizes = [int(v) for v in values]
+            elif args[i] == "--scales":
+                values, i = takeValues(args, i + 1)
+                scales = [int(v) for v in values]
+            elif args[i] == "--instructions":
+                instructions = int(args[i + 1])
+                i += 2
+            elif args[i] == "--repeat":
+                repeat = int(args[i + 1])
+                i += 2
+            elif args[i] == "--tolerance":
+                tolerance = float(args[i + 1])
+                i += 2
+            elif args[i] == "--skip-idle":
+                skipIdle = True
+                i += 1
+            elif args[i] == "--specialize":
+                specialize = True
+                i += 1
+            elif args[i] == "--out":
+                outFile = args[i + 1]
+                i += 2
+            elif args[i] == "--compare":
+                baselineFile = args[i + 1]
+                i += 2
+            else:
+                print(f"Error: Unknown benchmark option {args[i]}")
+                sys.exit(1)
+    except (IndexError, ValueError):
+        print(f"Error: {args[i]} requires a valid value")
+        sys.exit(1)
+
+    suite = runSuite(workloads, sizes, scales, instructions, repeat, skipIdle, lambda r: print(formatResult(r)),
+                     specialize)
+    if outFile:
+        saveBaseline(suite, outFile)
+        print(f"Baseline written to {outFile}")
+    if baselineFile:
+        regressions = compareBaseline(suite, baselineFile, tolerance)
+        if regressions:
+            print(f"\nRegressions against {baselineFile}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {tolerance:.0%} against {baselineFile}")
+
+def runSampleCommand(args):
+    from sampling import runSampling, formatEstimate, DEFAULT_MAX_INSTRUCTIONS
+    from sweep import parseProgram
+
+    instructionFile = None
+    hardwareRows = Tomasulo.defaultHardware
+    memFile = None
+    pc = 0
+    options = {"--interval": 100000, "--window": 1000, "--warmup": 200, "--max-samples": 50,
+               "--max-instructions": DEFAULT_MAX_INSTRUCTIONS, "--jobs": 0}
+    confidence = 0.95
+
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] in options:
+                options[args[i]] = int(args[i + 1])
+                i += 2
+            elif args[i] == "--confidence":
+                confidence = float(args[i + 1])
+                i += 2
+            elif args[i] == "--pc":
+                pc = int(args[i + 1])
+                i += 2
+            elif args[i] == "--hardware":
+                try:
+                    hardwareRows = Tomasulo.parseHardwareFile(args[i + 1])
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}")
+                    sys.exit(1)
+                i += 2
+            elif args[i] == "--mem":
+                memFile = args[i + 1]
+                i += 2
+            elif args[i].startswith("--"):
+                print(f"Error: Unknown sampling option {args[i]}")
+                sys.exit(1)
+            else:
+                instructionFile = args[i]
+                i += 1
+    except (IndexError, ValueError):
+        print(f"Error: {args[i]} requires a valid value")
+        sys.exit(1)
+
+    if not instructionFile:
+        print("Error: Instruction file is required")
+        sys.exit(1)
+    if options["--interval"] < 1 or options["--window"] < 1 or options["--max-samples"] < 1:
+        print("Error: --interval, --window and --max-samples must be at least 1")
+        sys.exit(1)
+    if options["--window"] > options["--interval"]:
+        print("Error: --window cannot be larger than --interval")
+        sys.exit(1)
+    if not 0 < confidence < 1:
+        print("Error: --confidence must be between 0 and 1")
+        sys.exit(1)
+
+    result = runSampling(parseProgram(instructionFile), hardwareRows, pc, memFile, options["--interval"],
+                         options["--window"], options["--warmup"], options["--max-samples"],
+                         options["--max-instructions"], confidence, options["--jobs"] or None)
+    print(formatEstimate(result))
+
+def runServeCommand(args):
+    import asyncio
+    from job_server import serve, DEFAULT_MAX_CYCLES, DEFAULT_JOB_TIMEOUT
+
+    host = "127.0.0.1"
+    port = 8765
+    socketPath = None
+    cacheDir = ".job_cache"
+    cacheMegabytes = 256
+    jobs = None
+    maxCycles = DEFAULT_MAX_CYCLES
+    jobTimeout = DEFAULT_JOB_TIMEOUT
+
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] == "--host":
+                host = args[i + 1]
+            elif args[i] == "--port":
+                port = int(args[i + 1])
+            elif args[i] == "--socket":
+                socketPath = args[i + 1]
+            elif args[i] == "--cache-dir":
+                cacheDir = args[i + 1]
+            elif args[i] == "--cache-size":
+                cacheMegabytes = int(args[i + 1])
+            elif args[i] == "--jobs":
+                jobs = int(args[i + 1])
+            elif args[i] == "--max-cycles":
+                maxCycles = int(args[i + 1])
+            elif args[i] == "--job-timeout":
+                jobTimeout = float(args[i + 1])
+            else:
+                print(f"Error: Unknown server option {args[i]}")
+                sys.exit(1)
+            i += 2
+    except (IndexError, ValueError):
+        print(f"Error: {args[i]} requires a valid value")
+        sys.exit(1)
+
+    if cacheMegabytes < 1 or (jobs is not None and jobs < 1) or maxCycles < 1:
+        print("Error: --cache-size, --jobs and --max-cycles must be at least 1")
+        sys.exit(1)
+    if jobTimeout <= 0:
+        print("Error: --job-timeout must be positive")
+        sys.exit(1)
+
+    try:
+        asyncio.run(serve(host, port, socketPath, cacheDir, cacheMegabytes << 20, jobs, maxCycles, jobTimeout))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+def runVerifyCommand(args):
+    from equivalence import runChecks
+
+    if args:
+        print(f"Error: Unknown verify option {args[0]}")
+        sys.exit(1)
+    mismatches = runChecks()
+    if mismatches:
+        print(f"\n{mismatches} mismatches with the generic engine")
+        sys.exit(1)
+    print("\nAll engines match the generic engine")
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python main.py [--gui] <instruction_file> [--hardware <hardware_file>] [--pc <pc_value>]")
+        print("Usage: python main.py [--gui] <instruction_file> [--hardware <hardware_file>] [--pc <pc_value>] [--skip-idle] [--verbosity <0-3>]")
+        print("                      [--issue-width <n>] [--writeback-policy <programOrder|longestLatencyFirst>]")
+        print("                      [--max-cycles <n>] [--max-instructions <n>] [--trace <trace.bin|trace.csv>] [--profile]")
+        print("                      [--specialize]")
+        print("                      [--mem <memory_file|image.bin>] [--dump-mem <memory_file|image.bin>]")
+        print("                      [--record-control <control.bin>] [--replay-control <control.bin>]")
+        print("                      [--fast-forward <n>] [--fast-forward-to <pc>] [--detailed <n>] [--resume-functional <n>]")
+        print("       python main.py --sweep <instruction_file>... [--hardware-list <file>...] [--grid <grid.json>]")
+        print("                      [--mem <memory_file>...] [--pc <pc_value>...] [--out <results.csv|.parquet>] [--jobs <n>]")
+        print("                      [--batch <configs per batch>] [--specialize] [--max-cycles <n>] [--max-instructions <n>]")
+        print("       python main.py --sample <instruction_file> [--hardware <hardware_file>] [--mem <memory_file>] [--pc <pc_value>]")
+        print("                      [--interval <n>] [--window <n>] [--warmup <n>] [--max-samples <n>] [--max-instructions <1000000>]")
+        print("                      [--confidence <0.95>] [--jobs <n>]")
+        print("       python main.py --benchmark [--workloads <name>...] [--sizes <n>...] [--scales <n>...] [--instructions <n>]")
+        print("                      [--repeat <n>] [--skip-idle] [--specialize] [--out <baseline.json>] [--compare <baseline.json>]")
+        print("                      [--tolerance <0.2>]")
+        print("       python main.py --serve [--host <127.0.0.1>] [--port <8765>] [--socket <path>] [--cache-dir <dir>]")
+        print("                      [--cache-size <megabytes>] [--jobs <n>] [--max-cycles <1000000>] [--job-timeout <seconds>]")
+        print("       python main.py --verify")
         sys.exit(1)
 
+    if sys.argv[1] == "--sweep":
+        runSweepCommand(sys.argv[2:])
+        return
+    if sys.argv[1] == "--benchmark":
+        runBenchmarkCommand(sys.argv[2:])
+        return
+    if sys.argv[1] == "--sample":
+        runSampleCommand(sys.argv[2:])
+        return
+    if sys.argv[1] == "--serve":
+        runServeCommand(sys.argv[2:])
+        return
+    if sys.argv[1] == "--verify":
+        runVerifyCommand(sys.argv[2:])
+        return
+
     isGui = False
     instructionFile = None
     hardwareFile = "hardware.txt"
     pc = 0
     isDefaultHardware = True
+    skipIdle = False
+    verbosity = Verbosity.DEBUG
+    memFile = None
+    dumpMemFile = None
+    issueWidth = None
+    writebackPolicy = None
+    maxCycles = None
+    maxInstructions = None
+    traceFile = None
+    profile = False
+    recordControlFile = None
+    replayControlFile = None
+    fastForward = 0
+    fastForwardTo = None
+    detailedInstructions = 0
+    resumeFunctional = None
+    specialize = False
 
     i = 1
     while i < len(sys.argv):
         if sys.argv[i] == "--gui":
             isGui = True
             i += 1
+        elif sys.argv[i] == "--skip-idle":
+            skipIdle = True
+            i += 1
+        elif sys.argv[i] == "--profile":
+            profile = True
+            i += 1
+        elif sys.argv[i] == "--specialize":
+            specialize = True
+            i += 1
+        elif sys.argv[i] in ("--mem", "--dump-mem"):
+            if i + 1 >= len(sys.argv):
+                print(f"Error: {sys.argv[i]} requires a file path")
+                sys.exit(1)
+            if sys.argv[i] == "--mem":
+                memFile = sys.argv[i + 1]
+            else:
+                dumpMemFile = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--issue-width":
+            try:
+                issueWidth = int(sys.argv[i + 1])
+                i += 2
+            except (IndexError, ValueError):
+                print("Error: --issue-width requires an integer")
+                sys.exit(1)
+            if issueWidth < 1:
+                print("Error: Issue width must be at least 1")
+                sys.exit(1)
+        elif sys.argv[i] == "--writeback-policy":
+            if i + 1 >= len(sys.argv) or sys.argv[i + 1] not in Tomasulo.writebackPriority:
+                print(f"Error: --writeback-policy requires one of: {', '.join(Tomasulo.writebackPriority)}")
+                sys.exit(1)
+            writebackPolicy = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] in ("--max-cycles", "--max-instructions"):
+            try:
+                budget = int(sys.argv[i + 1])
+            except (IndexError, ValueError):
+                print(f"Error: {sys.argv[i]} requires an integer (0 for no limit)")
+                sys.exit(1)
+            if sys.argv[i] == "--max-cycles":
+                maxCycles = budget
+            else:
+                maxInstructions = budget
+            i += 2
+        elif sys.argv[i] == "--trace":
+            if i + 1 >= len(sys.argv):
+                print("Error: --trace requires a file path")
+                sys.exit(1)
+            traceFile = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] in ("--fast-forward", "--fast-forward-to", "--detailed", "--resume-functional"):
+            try:
+                value = int(sys.argv[i + 1])
+            except (IndexError, ValueError):
+                print(f"Error: {sys.argv[i]} requires an integer")
+                sys.exit(1)
+            if sys.argv[i] == "--fast-forward":
+                fastForward = value
+            elif sys.argv[i] == "--fast-forward-to":
+                fastForwardTo = value
+            elif sys.argv[i] == "--detailed":
+                detailedInstructions = value
+            else:
+                resumeFunctional = value
+            i += 2
+        elif sys.argv[i] in ("--record-control", "--replay-control"):
+            if i + 1 >= len(sys.argv):
+                print(f"Error: {sys.argv[i]} requires a file path")
+                sys.exit(1)
+            if sys.argv[i] == "--record-control":
+                recordControlFile = sys.argv[i + 1]
+            else:
+                replayControlFile = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--verbosity":
+            try:
+                verbosity = Verbosity(int(sys.argv[i + 1]))
+                i += 2
+            except (IndexError, ValueError):
+                print("Error: --verbosity requires a level from 0 (quiet) to 3 (debug)")
+                sys.exit(1)
         elif sys.argv[i] == "--hardware":
             if i + 1 < len(sys.argv):
                 hardwareFile = sys.argv[i + 1]
@@ -54,11 +553,30 @@ def main():
     if not instructionFile:
         print("Error: Instruction file is required")
         sys.exit(1)
+    if recordControlFile and replayControlFile:
+        print("Error: --record-control and --replay-control cannot be combined")
+        sys.exit(1)
+    if (recordControlFile or replayControlFile) and (fastForward or fastForwardTo is not None or detailedInstructions):
+        print("Error: --record-control and --replay-control cannot be combined with --fast-forward, "
+              "--fast-forward-to or --detailed")
+        sys.exit(1)
+    if detailedInstructions and maxInstructions is not None:
+        print("Error: --detailed and --max-instructions cannot be combined")
+        sys.exit(1)
+    if resumeFunctional is not None and not detailedInstructions:
+        print("Error: --resume-functional requires --detailed")
+        sys.exit(1)
 
     if isGui:
         runGUI(instructionFile, isDefaultHardware, hardwareFile, pc)
     else:
-        runSimulation(instructionFile, isDefaultHardware, hardwareFile, pc)
+        runSimulation(instructionFile, isDefaultHardware, hardwareFile, pc, skipIdle=skipIdle, verbosity=verbosity,
+                      memFile=memFile, dumpMemFile=dumpMemFile, issueWidth=issueWidth, writebackPolicy=writebackPolicy,
+                      maxCycles=maxCycles, maxInstructions=maxInstructions, traceFile=traceFile, profile=profile,
+                      recordControlFile=recordControlFile, replayControlFile=replayControlFile,
+                      fastForward=fastForward, fastForwardTo=fastForwardTo,
+                      detailedInstructions=detailedInstructions, resumeFunctional=resumeFunctional,
+                      specialize=specialize)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
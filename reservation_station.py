@@ -1,9 +1,15 @@
 class ReservationStation:
+    # Fixed slots keep per-station overhead small for configs with thousands of stations
+    # and make the engine's attribute accesses cheaper than instance-dict lookups
+    __slots__ = ("id", "name", "busy", "oper", "vj", "vk", "qj", "qk", "addr",
+                 "cycles_per_exec", "cycles_per_addr", "remCyclesExec", "remCyclesAddr",
+                 "instIndex", "result", "seq", "issueCycle", "execStartCycle", "execEndCycle")
+
     def __init__(self, name, id, cyclesPerExec, cyclesPerAddress):
         self.id = id
         self.name = name
         self.busy = False
-        self.op = None
+        self.oper = None
         self.vj = 0
         self.vk = 0
         self.qj = 0
@@ -11,7 +17,11 @@ class ReservationStation:
         self.addr = 0
         self.cycles_per_exec = cyclesPerExec
         self.cycles_per_addr = cyclesPerAddress
-        self.rem_cycles_exec = 0
-        self.rem_cycles_addr = 0
-        self.inst_index = 0
-        self.result = 0 
\ No newline at end of file
+        self.remCyclesExec = 0
+        self.remCyclesAddr = 0
+        self.instIndex = 0
+        self.result = 0
+        self.seq = 0  # Dynamic sequence number of the instance in this station, in program order
+        self.issueCycle = 0
+        self.execStartCycle = 0
+        self.execEndCycle = 0
@@ -0,0 +1,137 @@
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist, fmean, stdev
+from typing import Dict, List, Optional, Tuple
+
+from events import NullSink
+from fast_forward import interpret, functionalBudget
+from tomasulo import Instruction, Tomasulo
+
+HardwareRows = List[Optional[List[int]]]
+
+# Functional pass length unless given: the budget of an open-ended functional run
+DEFAULT_MAX_INSTRUCTIONS = functionalBudget(Tomasulo.defaultMaxCycles)
+
+# Program and hardware shared by every worker, shipped once at pool start
+_program: List[Instruction] = []
+_hardwareRows: HardwareRows = []
+
+class SamplePoint:
+    # Architectural state after a number of functionally executed instructions
+    def __init__(self, position: int, pc: int, registers: List[int], memory: bytes):
+        self.position = position
+        self.pc = pc
+        self.registers = registers
+        self.memory = memory
+
+def findSamplePoints(sim: Tomasulo, interval: int, maxSamples: int,
+                     maxInstructions: int = 0) -> Tuple[int, List[SamplePoint]]:
+    # Run the program functionally from sim.pc, keeping the state every interval instructions.
+    # When more than 2 * maxSamples points are kept, every other one is dropped and the spacing
+    # doubles, so the points stay evenly spread over a run of unknown length.
+    # Returns the number of instructions executed and the points.
+    points: List[SamplePoint] = []
+    stride = 1
+    boundary = 0
+    executed = 0
+    while True:
+        if boundary % stride == 0:
+            points.append(SamplePoint(executed, sim.pc, list(sim.registers), sim.mem.tobytes()))
+            if len(points) > 2 * maxSamples:
+                points = points[::2]
+                stride *= 2
+        limit = min(interval, maxInstructions - executed) if maxInstructions else interval
+        ran = interpret(sim, limit)
+        executed += ran
+        boundary += 1
+        if ran < interval or (maxInstructions and executed >= maxInstructions):
+            return executed, points
+
+def _initWorker(program: List[Instruction], hardwareRows: HardwareRows):
+    global _program, _hardwareRows
+    _program = program
+    _hardwareRows = hardwareRows
+
+def simulateWindow(job: Tuple[int, List[int], bytes, int, int]) -> Tuple[int, int]:
+    # Detailed simulation from a sample point: warmup instructions fill the pipeline, then the
+    # next window instructions are measured. Returns (cycles, instructions) of the window.
+    pc, registers, memory, warmup, window = job
+    sim = Tomasulo.fromConfig(_program, _hardwareRows, pc)
+    sim.registers = registers
+    sim.mem = array('H')
+    sim.mem.frombytes(memory)
+    sim.setSink(NullSink())
+    sim.eventSkipping = True
+    sim.maxInstructions = warmup + window
+    sim.maxCycles = (warmup + window) * 100  # Guards against a window that stops retiring
+    warmCycles = warmInstructions = 0
+    for _ in sim.run():
+        if not warmInstructions and warmup and sim.wbInsts >= warmup:
+            warmCycles, warmInstructions = sim.cycle - 1, sim.wbInsts
+    return sim.cycle - 1 - warmCycles, sim.wbInsts - warmInstructions
+
+def estimate(windows: List[Tuple[int, int]], totalInstructions: int, confidence: float = 0.95) -> Dict[str, float]:
+    # Whole-program estimates from the windows' cycles per instruction, with a normal
+    # confidence interval on the mean CPI. The finite population correction makes the interval
+    # vanish when the windows cover the whole run.
+    measured = [(cycles, instructions) for cycles, instructions in windows if instructions]
+    cpis = [cycles / instructions for cycles, instructions in measured]
+    sampled = sum(instructions for _, instructions in measured)
+    cpi = fmean(cpis) if cpis else 0
+    coverage = min(1.0, sampled / totalInstructions) if totalInstructions else 1.0
+    if coverage >= 1.0:
+        halfWidth = 0.0
+    elif len(cpis) < 2:
+        halfWidth = math.inf
+    else:
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        halfWidth = z * stdev(cpis) / math.sqrt(len(cpis)) * math.sqrt(1 - coverage)
+    cpiLow, cpiHigh = max(cpi - halfWidth, 0), cpi + halfWidth
+    return {
+        "samples": len(measured),
+        "totalInstructions": totalInstructions,
+        "sampledInstructions": sampled,
+        "confidence": confidence,
+        "cpi": cpi,
+        "cycles": cpi * totalInstructions,
+        "cyclesLow": cpiLow * totalInstructions,
+        "cyclesHigh": cpiHigh * totalInstructions,
+        "ipc": 1 / cpi if cpi else 0,
+        "ipcLow": 1 / cpiHigh if cpiHigh else 0,
+        "ipcHigh": 1 / cpiLow if cpiLow else math.inf,
+        "relativeError": halfWidth / cpi if cpi else 0,
+    }
+
+def runSampling(program: List[Instruction], hardwareRows: HardwareRows, pc: int = 0, memFile: Optional[str] = None,
+                interval: int = 100000, window: int = 1000, warmup: int = 200, maxSamples: int = 50,
+                maxInstructions: int = DEFAULT_MAX_INSTRUCTIONS, confidence: float = 0.95, jobs: Optional[int] = None) -> Dict[str, float]:
+    sim = Tomasulo.fromConfig(program, hardwareRows, pc)
+    if memFile:
+        sim.loadMemory(memFile)
+    total, points = findSamplePoints(sim, interval, maxSamples, maxInstructions)
+
+    # The run itself starts with an empty pipeline, so a window there needs no warm-up. Windows
+    # that would run past the end of the run measure its tail, not a typical interval.
+    windowJobs = [(p.pc, p.registers, p.memory, warmup if p.position else 0, window) for p in points]
+    windowJobs = [job for job, p in zip(windowJobs, points) if p.position + job[3] + window <= total] or windowJobs[:1]
+
+    workers = min(jobs or os.cpu_count() or 1, len(windowJobs))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(program, hardwareRows)) as pool:
+        windows = list(pool.map(simulateWindow, windowJobs))
+    result = estimate(windows, total, confidence)
+    result["truncated"] = sim.pc < len(program)  # The functional pass stopped at maxInstructions
+    return result
+
+def formatEstimate(result: Dict[str, float]) -> str:
+    level = f"{result['confidence']:.0%}"
+    return "\n".join([
+        f"Instructions: {result['totalInstructions']} ({result['sampledInstructions']} simulated in detail "
+        f"over {result['samples']} windows)",
+        f"Cycles: {result['cycles']:.0f} ({level} interval {result['cyclesLow']:.0f} - {result['cyclesHigh']:.0f})",
+        f"IPC: {result['ipc']:.3f} ({level} interval {result['ipcLow']:.3f} - {result['ipcHigh']:.3f})",
+        f"Relative Error Bound: {result['relativeError']:.2%}",
+    ] + ([f"Truncated: the program did not finish within {result['totalInstructions']} instructions, so the "
+          "totals cover only that part of the run (raise --max-instructions, or 0 for no limit)"]
+         if result.get("truncated") else []))
@@ -0,0 +1,333 @@
+import hashlib
+import inspect
+import sys
+from heapq import heappush
+from typing import Callable, Dict, List, Optional, Tuple
+
+from events import EV_EXEC_START, EV_EXEC_END, EV_ADDR_DONE, EV_LOAD_DONE, EV_STORE_DONE, EV_WRITEBACK, EV_WRITEBACK_STORE
+from decoder import ADVANCES_PC, OP_CALL
+
+# Generated cycle functions by configuration hash, shared by every simulator in the process
+_compiled: Dict[str, Callable] = {}
+
+# The templates below restate Tomasulo.specializedMethods as code. TEMPLATE_HASH is the hash of
+# those methods' source that the templates match; after any change to them, no code is generated
+# until the templates are updated and TEMPLATE_HASH is set to the new templateHash(Tomasulo).
+# `python main.py --verify` compares generated and generic runs and reports a stale hash.
+TEMPLATE_HASH = "50e4913c22a65fbf12e2521b467b7e4a623792e6"
+_templateCurrent: Optional[bool] = None
+
+# (units, exec cycles, addr cycles) per station type, plus the issue width
+Layout = Tuple[Tuple[Tuple[int, int, int], ...], int]
+
+def layoutOf(sim) -> Optional[Layout]:
+    # None when a station type mixes cycle counts, which the generated code treats as constants
+    types = []
+    for stations in sim.stations:
+        cycles = {(s.cycles_per_exec, s.cycles_per_addr) for s in stations}
+        if len(cycles) > 1:
+            return None
+        execCycles, addrCycles = cycles.pop() if cycles else (0, 0)
+        types.append((len(stations), execCycles, addrCycles))
+    return tuple(types), sim.issueWidth
+
+def layoutHash(layout: Layout) -> str:
+    return hashlib.sha1(repr(layout).encode()).hexdigest()
+
+def templateHash(cls) -> str:
+    source = "".join(inspect.getsource(getattr(cls, name)) for name in cls.specializedMethods)
+    return hashlib.sha1(source.encode()).hexdigest()
+
+def templateIsCurrent(cls) -> bool:
+    # Without the engine's source the templates cannot be checked, so they are not used
+    global _templateCurrent
+    if _templateCurrent is None:
+        try:
+            _templateCurrent = templateHash(cls) == TEMPLATE_HASH
+        except (OSError, TypeError):
+            _templateCurrent = False
+    return _templateCurrent
+
+def compileNextCycle(sim) -> Optional[Callable]:
+    # Tomasulo.nextCycle specialized for sim's hardware: per-type loops unrolled, unused types
+    # dropped, cycle counts folded into constants. Returns a function to bind to the simulator, or
+    # None when the templates are stale or do not cover the configuration.
+    if not templateIsCurrent(type(sim)):
+        return None
+    layout = layoutOf(sim)
+    if layout is None:
+        return None
+    key = layoutHash(layout)
+    function = _compiled.get(key)
+    if function is None:
+        namespace = {"heappush": heappush, "sys": sys, "ADVANCES_PC": ADVANCES_PC, "OP_CALL": OP_CALL,
+                     "EV_EXEC_START": EV_EXEC_START, "EV_EXEC_END": EV_EXEC_END, "EV_ADDR_DONE": EV_ADDR_DONE,
+                     "EV_LOAD_DONE": EV_LOAD_DONE, "EV_STORE_DONE": EV_STORE_DONE, "EV_WRITEBACK": EV_WRITEBACK,
+                     "EV_WRITEBACK_STORE": EV_WRITEBACK_STORE}
+        exec(compile(generateSource(layout), f"<nextCycle {key[:12]}>", "exec"), namespace)
+        function = _compiled[key] = namespace["nextCycle"]
+    return function
+
+def generateSource(layout: Layout) -> str:
+    types, issueWidth = layout
+    lines = [
+        "def nextCycle(self):",
+        "    cycle = self.cycle",
+        "    program = self.program",
+        "    traceEvents = self.traceEvents",
+        "    sink = self.sink",
+    ]
+    lines += issueSource(issueWidth)
+    lines += writeBackSource(types)
+    lines += [
+        "    states = self.states",
+        "    shadowSeq = states[0].seq if states else None",
+        "    priority = self.writebackPriority[self.writebackPolicy]",
+        "    byId = lambda rs: rs.id",
+    ]
+    for i in range(2, len(types)):
+        if types[i][0]:
+            lines += executeSource(i, types[i][1])
+    if types[0][0] or types[1][0]:
+        lines += memorySource(types)
+    lines += sampleSource(types)
+    lines.append("    self.cycle = cycle + 1")
+    return "\n".join(lines) + "\n"
+
+def issueSource(issueWidth: int) -> List[str]:
+    # Tomasulo.issue, including its fetch frontier update
+    if issueWidth == 1:
+        return [
+            "    if self.pc < len(program):",
+            "        fetched = self.pc",
+            "        if self.issueInstruction():",
+            "            self.issueHistogram[1] += 1",
+            "        else:",
+            "            self.issueHistogram[0] += 1",
+            "            self.issueStalls[self.issueStallCause()] += 1",
+            "        if self.pc >= len(program):",
+            "            fetched = self.pc",
+            "        elif fetched < 0:",
+            "            fetched = sys.maxsize",
+            "        if fetched > self.fetchFrontier:",
+            "            self.fetchFrontier = fetched",
+            "    elif self.pc > self.fetchFrontier:",
+            "        self.fetchFrontier = self.pc",
+        ]
+    return [
+        "    if self.pc < len(program):",
+        "        issued = 0",
+        "        fetched = self.pc",
+        "        decodedOp = self.decoded.op",
+        f"        while issued < {issueWidth} and self.pc < len(program):",
+        "            fetched = self.pc",
+        "            op = decodedOp[self.pc]",
+        "            if not self.issueInstruction():",
+        "                break",
+        "            issued += 1",
+        "            if not ADVANCES_PC[op]:",
+        "                break",
+        "        if self.pc >= len(program):",
+        "            fetched = self.pc",
+        "        elif fetched < 0:",
+        "            fetched = sys.maxsize",
+        "        if fetched > self.fetchFrontier:",
+        "            self.fetchFrontier = fetched",
+        "        self.issueHistogram[issued] += 1",
+        "        if issued == 0:",
+        "            self.issueStalls[self.issueStallCause()] += 1",
+        "    elif self.pc > self.fetchFrontier:",
+        "        self.fetchFrontier = self.pc",
+    ]
+
+def writeBackSource(types) -> List[str]:
+    lines = [
+        "    storeS = self.popCompleted(self.completedStores)",
+        "    writeS = self.popCompleted(self.completedResults)",
+        "    if storeS is not None:",
+        "        self.wbInsts += 1",
+        "        self.storePortBusyCycles += 1",
+        "        self.release(1, storeS)",
+        "        program[storeS.instIndex].write = cycle",
+        "        self.writeMem(storeS.addr, storeS.vk & 0xFFFF)",
+        "        if traceEvents:",
+        "            sink.event(EV_WRITEBACK_STORE, cycle, storeS.instIndex)",
+        "        if self.retireHook is not None:",
+        "            self.retire(storeS)",
+        "    if writeS is not None:",
+        "        self.wbInsts += 1",
+        "        self.cdbBusyCycles += 1",
+        "        stationType = self.idToRs[writeS.id][0]",
+        "        self.release(stationType, writeS)",
+        "        program[writeS.instIndex].write = cycle",
+        "        if traceEvents:",
+        "            sink.event(EV_WRITEBACK, cycle, writeS.instIndex)",
+        "        if self.retireHook is not None:",
+        "            self.retire(writeS)",
+    ]
+    # Control flow only exists for the types this configuration has stations for
+    branches = []
+    if types[3][0]:
+        branches += [
+            "stationType == 3:",
+            "            if self.decoded.op[writeS.instIndex] == OP_CALL:",
+            "                self.registers[1] = writeS.instIndex + 1",
+            "                self.pc = writeS.instIndex + 1 + writeS.addr",
+            "            else:",
+            "                self.pc = self.returnAddress(writeS)",
+            "            self.flushYounger(writeS)",
+        ]
+    if types[2][0]:
+        branches += [
+            "stationType == 2:",
+            "            self.numBne += 1",
+            "            if writeS.result:",
+            "                self.pc = writeS.instIndex + 1 + writeS.addr",
+            "                self.misprediction += 1",
+            "                self.flushYounger(writeS)",
+            "            else:",
+            "                if self.states:",
+            "                    self.restoreRegisterStatus(self.states[0].register_stat)",
+            "                    self.states.popleft()",
+            "                self.pc = writeS.instIndex + 1",
+        ]
+    keyword = "if"
+    for line in branches:
+        if line.startswith("stationType"):
+            lines.append(f"        {keyword} {line}")
+            keyword = "elif"
+        else:
+            lines.append(line)
+    lines += [
+        "        if stationType != 1 and stationType != 2:",
+        "            self.broadcast(writeS)",
+    ]
+    return lines
+
+def executeSource(i: int, execCycles: int) -> List[str]:
+    # Tomasulo.execute for one non-load/store type, with advance() and completed() inlined
+    return [
+        f"    ready = self.readyStations[{i}]",
+        f"    inFlight = self.inFlightStations[{i}]",
+        "    if ready or inFlight:",
+        "        for s in sorted(ready | inFlight, key=byId):",
+        "            if s.busy and s.issueCycle < cycle:",
+        "                if shadowSeq is not None and s.seq > shadowSeq:",
+        "                    continue",
+        "                remaining = s.remCyclesExec",
+        "                if s.qj == 0 and s.qk == 0 and remaining:",
+        f"                    if remaining == {execCycles}:",
+        "                        program[s.instIndex].execSt = cycle",
+        "                        s.execStartCycle = cycle",
+        "                        if traceEvents:",
+        "                            sink.event(EV_EXEC_START, cycle, s.instIndex)",
+        "                    remaining -= 1",
+        "                    s.remCyclesExec = remaining",
+        "                    ready.discard(s)",
+        "                    if remaining:",
+        "                        inFlight.add(s)",
+        "                    else:",
+        "                        inFlight.discard(s)",
+        "                        self.Instructions_logic(s)",
+        "                        program[s.instIndex].execEnd = cycle",
+        "                        s.execEndCycle = cycle",
+        "                        heappush(self.completedResults, (priority(self, s), s.seq, s.id))",
+        "                        if traceEvents:",
+        "                            sink.event(EV_EXEC_END, cycle, s.instIndex)",
+    ]
+
+def memorySource(types) -> List[str]:
+    # The load and store halves of Tomasulo.execute, in the same order
+    lines = [
+        "    queuePop = False",
+        "    loadStoreQueue = self.loadStoreQueue",
+        "    queueHead = loadStoreQueue[0] if loadStoreQueue else None",
+    ]
+    for i in (0, 1):
+        units, execCycles, addrCycles = types[i]
+        if not units:
+            continue
+        lines += [
+            f"    ready = self.readyStations[{i}]",
+            f"    inFlight = self.inFlightStations[{i}]",
+            "    if ready or inFlight:",
+            "        for s in sorted(ready | inFlight, key=byId):",
+            "            if s.busy and s.issueCycle < cycle:",
+            "                if shadowSeq is not None and s.seq > shadowSeq:",
+            "                    continue",
+            "                if s.remCyclesAddr:",
+            "                    if s.qj == 0 and queueHead == s.seq:",
+            f"                        if s.remCyclesAddr == {addrCycles}:",
+            "                            program[s.instIndex].execSt = cycle",
+            "                            s.execStartCycle = cycle",
+            "                        s.remCyclesAddr -= 1",
+            "                        if s.remCyclesAddr == 0:",
+            "                            addr = self.effectiveAddress(s)",
+        ]
+        if i == 0:
+            lines.append("                            self.movePendingLoad(s, addr)")
+        lines += [
+            "                            s.addr = addr",
+            "                            queuePop = True",
+            "                            if traceEvents:",
+            "                                sink.event(EV_ADDR_DONE, cycle, s.instIndex)",
+            "                        ready.discard(s)",
+            "                        if (s.qj == 0) if s.remCyclesAddr else s.remCyclesExec:",
+            "                            inFlight.add(s)",
+            "                        else:",
+            "                            inFlight.discard(s)",
+            "                elif s.remCyclesExec:",
+        ]
+        if i == 1:
+            lines += [
+                "                    if not self.storeBlockedByLoad(s):",
+                "                        s.remCyclesExec -= 1",
+                "                        ready.discard(s)",
+                "                        if s.remCyclesExec:",
+                "                            inFlight.add(s)",
+                "                        else:",
+                "                            inFlight.discard(s)",
+                "                            program[s.instIndex].execEnd = cycle",
+                "                            s.execEndCycle = cycle",
+                "                            if s.qk == 0:",
+                "                                heappush(self.completedStores, (priority(self, s), s.seq, s.id))",
+                "                            if traceEvents:",
+                "                                sink.event(EV_STORE_DONE, cycle, s.instIndex)",
+            ]
+        else:
+            lines += [
+                "                    s.remCyclesExec -= 1",
+                "                    ready.discard(s)",
+                "                    if s.remCyclesExec:",
+                "                        inFlight.add(s)",
+                "                    else:",
+                "                        inFlight.discard(s)",
+                "                        program[s.instIndex].execEnd = cycle",
+                "                        s.execEndCycle = cycle",
+                "                        s.result = self.mem[s.addr] & 0xFFFF",
+                "                        heappush(self.completedResults, (priority(self, s), s.seq, s.id))",
+                "                        if traceEvents:",
+                "                            sink.event(EV_LOAD_DONE, cycle, s.instIndex)",
+            ]
+    lines += [
+        "    if queuePop and loadStoreQueue:",
+        "        loadStoreQueue.popleft()",
+    ]
+    return lines
+
+def sampleSource(types) -> List[str]:
+    # Tomasulo.sampleUtilization for one cycle; types without stations always sample 0 busy
+    lines = [
+        "    histogram = self.occupancyHistogram",
+        "    busyByType = self.busyByType",
+    ]
+    for i, (units, _, _) in enumerate(types):
+        lines.append(f"    histogram[{i}][busyByType[{i}]] += 1" if units else f"    histogram[{i}][0] += 1")
+    lines += [
+        "    depth = len(self.loadStoreQueue)",
+        "    depths = self.lsqDepthHistogram",
+        "    if depth >= len(depths):",
+        "        depths += [0] * (depth + 1 - len(depths))",
+        "    depths[depth] += 1",
+    ]
+    return lines
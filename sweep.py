@@ -0,0 +1,263 @@
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from events import NullSink
+from tomasulo import Instruction, Tomasulo
+
+HardwareRows = List[Optional[List[int]]]
+
+RESULT_FIELDS = ["program", "hardware", "hardwareRows", "memory", "pc", "finished",
+                 "cycles", "instructions", "ipc", "branches", "mispredictions", "mispredictionRate",
+                 "issueWidth", "issuedPerCycle"] + \
+                [f"{name}Occupancy" for name in Tomasulo.stationNames] + \
+                [f"{cause}Stalls" for cause in Tomasulo.stallCauses] + \
+                ["cdbUtilization", "storePortUtilization", "avgLsqDepth", "maxLsqDepth"]
+
+# Programs parsed once by the parent process, shipped to every worker at pool start
+_programs: Dict[str, List[Instruction]] = {}
+# Whether workers run generated per-configuration cycle functions
+_specialize = False
+# Run budgets of every job; 0 means unlimited
+_maxCycles = Tomasulo.defaultMaxCycles
+_maxInstructions = 0
+
+def parseProgram(instructionFile: str) -> List[Instruction]:
+    sim = Tomasulo(None, False, None, 0)
+    sim.readInstFile(instructionFile)
+    return sim.program
+
+def formatHardware(rows: HardwareRows) -> str:
+    return "|".join(":".join(str(v) for v in row) if row is not None else "-" for row in rows)
+
+def loadGrid(gridFile: str) -> List[Tuple[str, HardwareRows]]:
+    # Grid file: JSON object keyed by station type name ("load", "add", ...), each with optional
+    # "units", "cycles" and (load/store only) "addr" lists. Missing entries keep the default config.
+    # An optional "issue" entry with a "width" list sweeps the issue width as well.
+    # Raises OSError or ValueError for a grid file that cannot be read or is malformed.
+    with open(gridFile) as f:
+        try:
+            grid = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Grid file {gridFile} is not valid JSON: {e}")
+    if not isinstance(grid, dict) or not all(isinstance(spec, dict) for spec in grid.values()):
+        raise ValueError(f"Grid file {gridFile} must map station type names to objects of value lists")
+
+    unknown = set(grid) - set(Tomasulo.stationNames) - {"issue"}
+    if unknown:
+        raise ValueError(f"Unknown station types in grid: {', '.join(sorted(unknown))}")
+
+    axes = []
+    for i, name in enumerate(Tomasulo.stationNames):
+        default = Tomasulo.defaultHardware[i]
+        spec = grid.get(name, {})
+        units = spec.get("units", [default[0]])
+        cycles = spec.get("cycles", [default[1]])
+        addr = spec.get("addr", [default[2] if len(default) > 2 else 0])
+        axes.append([[u, c, a] for u in _gridValues(gridFile, name, units) for c in _gridValues(gridFile, name, cycles)
+                     for a in _gridValues(gridFile, name, addr)])
+    if "issue" in grid:
+        widths = _gridValues(gridFile, "issue", grid["issue"].get("width", [Tomasulo.defaultIssueWidth]))
+        if 0 in widths:
+            raise ValueError(f"Grid file {gridFile}: issue widths must be at least 1")
+        axes.append([[w] for w in widths])
+
+    label = os.path.basename(gridFile)
+    return [(f"{label}#{k}", [list(row) for row in rows]) for k, rows in enumerate(itertools.product(*axes))]
+
+def _gridValues(gridFile: str, name: str, value) -> List[int]:
+    values = value if isinstance(value, list) else [value]
+    if not values or not all(isinstance(v, int) and not isinstance(v, bool) and v >= 0 for v in values):
+        raise ValueError(f"Grid file {gridFile}: values for {name} must be non-negative integers")
+    return values
+
+def _initWorker(programs: Dict[str, List[Instruction]], specialize: bool = False,
+                maxCycles: int = Tomasulo.defaultMaxCycles, maxInstructions: int = 0):
+    global _programs, _specialize, _maxCycles, _maxInstructions
+    _programs = programs
+    _specialize = specialize
+    _maxCycles = maxCycles
+    _maxInstructions = maxInstructions
+
+def runQuietly(sim: Tomasulo):
+    sim.eventSkipping = True
+    sim.specializeCycle = _specialize
+    sim.maxCycles = _maxCycles
+    sim.maxInstructions = _maxInstructions
+    sim.setSink(NullSink())
+    sim.initiateRunning()
+
+def runJob(job: Tuple[str, str, HardwareRows, Optional[str], int]) -> Dict[str, object]:
+    program, hardwareName, hardwareRows, memFile, pc = job
+    sim = Tomasulo.fromConfig(_programs[program], hardwareRows, pc)
+    if memFile:
+        sim.loadMemory(memFile)
+    runQuietly(sim)
+
+    row: Dict[str, object] = {
+        "program": program,
+        "hardware": hardwareName,
+        "hardwareRows": formatHardware(hardwareRows),
+        "memory": memFile or "",
+        "pc": pc,
+        "finished": sim.isFinished(),
+    }
+    row.update(sim.metrics())
+    return row
+
+def runBatchJob(job: Tuple[str, List[Tuple[str, HardwareRows]], Optional[str], int]) -> List[Dict[str, object]]:
+    # One program, memory and pc on many hardware configurations: the ones the batch engine
+    # supports run together in lockstep, any others one by one
+    from batch import BatchTomasulo, supportsConfig
+
+    program, hardware, memFile, pc = job
+    batched = [k for k, (_, rows) in enumerate(hardware) if supportsConfig(rows)]
+    metrics: Dict[int, Dict[str, float]] = {}
+    if batched:
+        memory = None
+        if memFile:
+            sim = Tomasulo.fromConfig(_programs[program], Tomasulo.defaultHardware, pc)
+            sim.loadMemory(memFile)
+            memory = sim.mem
+        engine = BatchTomasulo(_programs[program], [hardware[k][1] for k in batched], pc, memory)
+        engine.maxCycles = _maxCycles
+        engine.maxInstructions = _maxInstructions
+        engine.run()
+        metrics = dict(zip(batched, engine.metrics()))
+        finished = dict(zip(batched, (engine.isFinished(b) for b in range(engine.size))))
+
+    results = []
+    for k, (name, rows) in enumerate(hardware):
+        if k in metrics:
+            row: Dict[str, object] = {
+                "program": program,
+                "hardware": name,
+                "hardwareRows": formatHardware(rows),
+                "memory": memFile or "",
+                "pc": pc,
+                "finished": finished[k],
+            }
+            row.update(metrics[k])
+            results.append(row)
+        else:
+            results.append(runJob((program, name, rows, memFile, pc)))
+    return results
+
+class CsvResultWriter:
+    def __init__(self, outFile: str):
+        self.file = open(outFile, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row: Dict[str, object]):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ParquetResultWriter:
+    # Rows are buffered and written as row groups so results stream to disk during long sweeps
+    def __init__(self, outFile: str, rowGroupSize: int = 1024):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("program", pa.string()), ("hardware", pa.string()), ("hardwareRows", pa.string()),
+            ("memory", pa.string()), ("pc", pa.int64()), ("finished", pa.bool_()), ("cycles", pa.int64()),
+            ("instructions", pa.int64()), ("ipc", pa.float64()), ("branches", pa.int64()),
+            ("mispredictions", pa.int64()), ("mispredictionRate", pa.float64()),
+            ("issueWidth", pa.int64()), ("issuedPerCycle", pa.float64()),
+        ] + [(f"{name}Occupancy", pa.float64()) for name in Tomasulo.stationNames] +
+            [(f"{cause}Stalls", pa.int64()) for cause in Tomasulo.stallCauses] + [
+            ("cdbUtilization", pa.float64()), ("storePortUtilization", pa.float64()),
+            ("avgLsqDepth", pa.float64()), ("maxLsqDepth", pa.int64()),
+        ])
+        self.writer = pq.ParquetWriter(outFile, self.schema)
+        self.rowGroupSize = rowGroupSize
+        self.rows: List[Dict[str, object]] = []
+
+    def write(self, row: Dict[str, object]):
+        self.rows.append(row)
+        if len(self.rows) >= self.rowGroupSize:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def openResultWriter(outFile: str):
+    if outFile.endswith(".parquet"):
+        return ParquetResultWriter(outFile)
+    return CsvResultWriter(outFile)
+
+def buildJobs(programs: Sequence[str], hardware: Sequence[Tuple[str, HardwareRows]],
+              memories: Sequence[Optional[str]], pcs: Sequence[int]) -> Iterator[Tuple[str, str, HardwareRows, Optional[str], int]]:
+    for program in programs:
+        for hardwareName, rows in hardware:
+            for memFile in memories:
+                for pc in pcs:
+                    yield (program, hardwareName, rows, memFile, pc)
+
+def runSweep(programs: Sequence[str], hardware: Sequence[Tuple[str, HardwareRows]], outFile: str,
+             memories: Sequence[Optional[str]] = (None,), pcs: Sequence[int] = (0,),
+             jobs: Optional[int] = None, batchSize: int = 0, specialize: bool = False,
+             maxCycles: int = Tomasulo.defaultMaxCycles, maxInstructions: int = 0) -> int:
+    parsed = {program: parseProgram(program) for program in programs}
+    budgets = (maxCycles, maxInstructions)
+    if batchSize:
+        return runBatchSweep(parsed, hardware, outFile, memories, pcs, jobs, batchSize, specialize, *budgets)
+    jobList = list(buildJobs(programs, hardware, memories, pcs))
+
+    workers = jobs or os.cpu_count() or 1
+    chunkSize = max(1, len(jobList) // (workers * 8))
+
+    writer = openResultWriter(outFile)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                 initargs=(parsed, specialize) + budgets) as pool:
+            for row in pool.map(runJob, jobList, chunksize=chunkSize):
+                writer.write(row)
+    finally:
+        writer.close()
+    return len(jobList)
+
+def runBatchSweep(parsed: Dict[str, List[Instruction]], hardware: Sequence[Tuple[str, HardwareRows]], outFile: str,
+                  memories: Sequence[Optional[str]], pcs: Sequence[int], jobs: Optional[int], batchSize: int,
+                  specialize: bool = False, maxCycles: int = Tomasulo.defaultMaxCycles,
+                  maxInstructions: int = 0) -> int:
+    # Each worker task runs up to batchSize hardware configurations of one program/memory/pc
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Batched sweeps require numpy (pip install numpy)")
+
+    chunks = [hardware[k:k + batchSize] for k in range(0, len(hardware), batchSize)]
+    jobList = [(program, chunk, memFile, pc) for program in parsed for memFile in memories
+               for pc in pcs for chunk in chunks]
+    workers = jobs or os.cpu_count() or 1
+
+    nRuns = 0
+    writer = openResultWriter(outFile)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                 initargs=(parsed, specialize, maxCycles, maxInstructions)) as pool:
+            for rows in pool.map(runBatchJob, jobList):
+                for row in rows:
+                    writer.write(row)
+                nRuns += len(rows)
+    finally:
+        writer.close()
+    return nRuns
@@ -1,7 +1,19 @@
 from enum import Enum, auto
-from typing import List, Dict, Tuple, Deque, Optional
+from typing import Callable, Iterator, List, Dict, Tuple, Deque, Optional, Set
 from collections import deque, defaultdict
+import heapq
+import os
 import sys
+import copy
+import time
+import mmap
+from array import array
+from reservation_station import ReservationStation
+from events import (EventSink, TextSink, Verbosity, EV_ISSUE, EV_EXEC_START, EV_EXEC_END, EV_ADDR_DONE,
+                    EV_LOAD_DONE, EV_STORE_DONE, EV_WRITEBACK, EV_WRITEBACK_STORE, EV_BEQ_COMPARE)
+from specialize import compileNextCycle
+from decoder import (DecodedProgram, decodeInstructions, loadProgram, STATION_TYPE, READS_RT, IS_MEMORY,
+                     IS_CONTROL, ADVANCES_PC, OP_BEQ, OP_CALL)
 
 class InstCategory(Enum):
     LOAD = auto()
@@ -105,107 +117,313 @@ class Instruction:
         except (IndexError, ValueError) as e:
             raise ValueError(f"Invalid instruction format: {inst_str} - {str(e)}")
 
-class ReservationStation:
-    def __init__(self, name: str, id: int, cycles_per_exec: int, cycles_per_addr: int):
-        self.id = id
-        self.name = name
-        self.busy = False
-        self.oper: Optional[InstOp] = None
-        self.vj = 0
-        self.vk = 0
-        self.qj = 0
-        self.qk = 0
-        self.addr = 0
-        self.cycles_per_exec = cycles_per_exec
-        self.cycles_per_addr = cycles_per_addr
-        self.rem_cycles_exec = 0
-        self.rem_cycles_addr = 0
-        self.instIndex = 0
-        self.result = 0
+    @classmethod
+    def fromDecoded(cls, decoded: DecodedProgram, k: int) -> "Instruction":
+        # Rebuild instruction k from a decoded program without re-parsing its text
+        inst = cls.__new__(cls)
+        op = decoded.op[k]
+        inst.issue = 0
+        inst.exec_st = 0
+        inst.exec_end = 0
+        inst.wb = 0
+        inst.rd = decoded.rd[k]
+        inst.rs = decoded.rs[k]
+        inst.rt = decoded.rt[k]
+        inst.imm = decoded.imm[k]
+        inst.addr = inst.imm if op in (OP_BEQ, OP_CALL) else 0
+        inst.category = OP_CATEGORY[op]
+        inst.oper = OP_OPER[op]
+        inst.index = decoded.lineIndex[k]
+        inst.inst = decoded.text[k]
+        inst.op_str = OP_STR[op]
+        return inst
+
+# Indexed by decoder opcode, which follows the InstOp declaration order
+OP_OPER = list(InstOp)
+OP_STR = [oper.name.lower() for oper in OP_OPER]  # Enum .name lookups are slow on long programs
+OP_CATEGORY = [InstCategory.LOAD, InstCategory.STORE, InstCategory.BEQ, InstCategory.CALL, InstCategory.CALL,
+               InstCategory.ADDITION, InstCategory.SUBTRACTION, InstCategory.NOR, InstCategory.MUL]
 
 class SystemState:
-    def __init__(self, issue: int, register_stat: List[int]):
+    def __init__(self, issue: int, register_stat: List[int], seq: int):
         self.issue = issue
         self.register_stat = register_stat.copy()
+        self.seq = seq  # Sequence number of the branch; younger instructions are speculative
+
+class Checkpoint:
+    # Simulator state at the start of a cycle. Memory is not copied: journalPos marks where the
+    # run's memory write journal stood, and restoring undoes or redoes writes back to that point.
+    def __init__(self, cycle: int, state: Dict[str, object], timings: List[Tuple[int, int, int, int]], journalPos: int):
+        self.cycle = cycle
+        self.state = state
+        self.timings = timings
+        self.journalPos = journalPos
 
 class Tomasulo:
     nStationTypes = 8
     nRegisters = 8
+    memWords = 1 << 16
+    memImageExtension = ".bin"  # Memory files with this extension are binary images
+    # Everything a checkpoint copies, besides instruction timings and memory. Copied together
+    # so structures that share station objects still share them after a restore.
+    checkpointFields = ("pc", "cycle", "numBne", "misprediction", "wbInsts", "busyStations", "registers",
+                        "registerStatusTable", "stations", "tagWaiters", "tagRegisters", "readyStations",
+                        "inFlightStations", "loadStoreQueue", "states", "issueHistogram",
+                        "nextSeq", "inFlightOrder", "completedStores", "completedResults",
+                        "pendingLoads", "busyByType", "occupancyHistogram", "lsqDepthHistogram", "issueStalls",
+                        "cdbBusyCycles", "storePortBusyCycles", "fetchFrontier")
+    stationNames = ["load", "store", "beq", "call", "add", "sub", "nor", "mul"]
+    defaultHardware = [
+        [2, 2, 1],  # load: 2 units, 2 cycles (1 addr + 1 mem), 1 addr cycle
+        [2, 2, 1],  # store: 2 units, 2 cycles (1 addr + 1 mem), 1 addr cycle
+        [1, 1],     # beq: 1 unit, 1 cycle
+        [1, 1],     # call/ret: 1 unit, 1 cycle
+        [3, 2],     # add: 3 units, 2 cycles
+        [1, 2],     # sub: 1 unit, 2 cycles (shares with add)
+        [1, 1],     # nor: 1 unit, 1 cycle (shares with add)
+        [2, 10]     # mul: 2 units, 10 cycles
+    ]
+    defaultIssueWidth = 1
+    defaultMaxCycles = 1000
+    profiledPhases = ("issue", "writeBack", "execute", "flushYounger", "broadcast")
+    # Methods a generated nextCycle inlines; a subclass overriding any of them runs the generic one
+    specializedMethods = ("nextCycle", "issue", "writeBack", "execute", "sampleUtilization", "completed",
+                          "advance", "hasPendingWork", "scheduledStations")
+    # Why the instruction at the PC could not issue, judged by the oldest station of its type
+    stallCauses = ("structural", "operandWait", "branchShadow")
+    STALL_STRUCTURAL, STALL_OPERAND_WAIT, STALL_BRANCH_SHADOW = range(3)
 
-    def __init__(self, instructionFile: str, isDefaultHardware: bool, hardwareFile: str, pc: int):
-        self.mem = [0] * (1 << 16)  # word addressable with word size of 16 bits
+    def __init__(self, instructionFile: Optional[str], isDefaultHardware: bool, hardwareFile: Optional[str], pc: int):
+        self.mem = array('H', bytes(2 * self.memWords))  # word addressable with word size of 16 bits
         self.registers = [0] * self.nRegisters
         self.program: List[Instruction] = []
+        self.decoded = DecodedProgram()
         self.stations: List[List[ReservationStation]] = [[] for _ in range(self.nStationTypes)]
         self.idToRs: Dict[int, Tuple[int, int]] = {}
         self.registerStatusTable = [0] * self.nRegisters
-        self.loadStoreQueue: Deque[int] = deque()
+        # Producer tag -> stations waiting on it, and producer tag -> registers it renamed,
+        # so a result broadcast only touches actual dependents
+        self.tagWaiters: Dict[int, Set[ReservationStation]] = defaultdict(set)
+        self.tagRegisters: Dict[int, Set[int]] = defaultdict(set)
+        # Per-type scheduler: stations whose operands are ready but have not started counting
+        # down, and stations already counting down. execute() only visits these.
+        self.readyStations: List[Set[ReservationStation]] = [set() for _ in range(self.nStationTypes)]
+        self.inFlightStations: List[Set[ReservationStation]] = [set() for _ in range(self.nStationTypes)]
+        self.busyStations = 0
+        self.busyByType = [0] * self.nStationTypes
+        # Utilization counters, sized by configureHardware and reset by cleanup:
+        # cycles by busy station count per type, cycles by load/store queue depth,
+        # issue stall cycles per cause, and cycles each write-back port was used
+        self.occupancyHistogram: List[List[int]] = [[0] for _ in range(self.nStationTypes)]
+        self.lsqDepthHistogram = [0]
+        self.issueStalls = [0] * len(self.stallCauses)
+        self.cdbBusyCycles = 0
+        self.storePortBusyCycles = 0
+        self.loadStoreQueue: Deque[int] = deque()  # Sequence numbers of issued loads/stores
         self.states: Deque[SystemState] = deque()
+        # Issued instances as (seq, station) in program order. Entries whose station has since
+        # been released or reused are stale and dropped lazily from either end.
+        self.inFlightOrder: Deque[Tuple[int, ReservationStation]] = deque()
+        self.nextSeq = 1
+        # Finished instances waiting for write-back as (priority, seq, station id) heaps: stores
+        # for the memory port, everything else for the common data bus. Entries are checked when
+        # popped, so flushed or reused stations need no removal.
+        self.completedStores: List[Tuple[Tuple[int, ...], int, int]] = []
+        self.completedResults: List[Tuple[Tuple[int, ...], int, int]] = []
+        self.writebackPolicy = "programOrder"
+        # Address -> busy load stations currently holding that address (the raw offset until
+        # their address calculation completes), for the store WAR check
+        self.pendingLoads: Dict[int, Set[ReservationStation]] = defaultdict(set)
         self.pc = pc  # Initial PC value
         self.cycle = 1
         self.numBne = 0
         self.misprediction = 0
         self.wbInsts = 0
+        self.issueWidth = self.defaultIssueWidth  # Instructions issued per cycle, in program order
+        self.issueHistogram = [0] * (self.issueWidth + 1)  # Cycles by number of instructions issued
+        self.eventSkipping = False  # Jump over cycles where only countdowns progress
+        self.stopRequested = False  # Set from another thread to cancel initiateRunning
+        self.checkpointInterval = 0  # Cycles between checkpoints, 0 disables checkpointing
+        self.checkpoints: List[Checkpoint] = []
+        self.memJournal: Optional[List[Tuple[int, int, int]]] = None  # (addr, old, new) per store
+        self.journalPos = 0
+        self.runCycles = 0
+        # Highest PC the issue stage has looked at this run; instructions past it cannot have
+        # influenced the run yet, which is what lets an edited program resume from a checkpoint
+        self.fetchFrontier = -1
+        self.resumePending = False  # editProgram restored a checkpoint for the next run to continue from
+        self.maxCycles = self.defaultMaxCycles  # Run budgets; 0 means unlimited
+        self.maxInstructions = 0
+        self.drainAfterBudget = False  # Finish in-flight instructions once maxInstructions is reached
+        # Called with (seq, instIndex, issue, execStart, execEnd, write) for every dynamic
+        # instruction as it writes back
+        self.retireHook: Optional[Callable[[Tuple[int, int, int, int, int, int]], None]] = None
+        self.profile: Optional[Dict[str, List[float]]] = None  # Phase -> [calls, seconds] while profiling
+        self.profileRunTime = 0.0
+        self.specializeCycle = False  # Run a nextCycle generated for the hardware configuration
+        self.setSink(TextSink())
         
-        self.readInstFile(instructionFile)
-        self.readHardware(isDefaultHardware, hardwareFile)
+        if instructionFile is not None:
+            self.readInstFile(instructionFile)
+        if isDefaultHardware or hardwareFile is not None:
+            self.readHardware(isDefaultHardware, hardwareFile)
+
+    def requestStop(self):
+        self.stopRequested = True
+
+    def setSink(self, sink: EventSink):
+        # Pipeline events are only generated when the sink asks for them
+        self.sink = sink
+        sink.attach(self)
+        self.traceEvents = sink.level >= Verbosity.EVENTS
+
+    @classmethod
+    def fromConfig(cls, program: List[Instruction], hardwareRows: List[Optional[List[int]]], pc: int) -> "Tomasulo":
+        # Build a simulator from an already parsed program and hardware rows, e.g. for sweeps
+        sim = cls(None, False, None, pc)
+        sim.program = [copy.copy(inst) for inst in program]
+        sim.decoded = decodeInstructions(sim.program)
+        sim.configureHardware(hardwareRows)
+        return sim
 
     def readInstFile(self, instFile: str):
+        self.decoded = loadProgram(instFile, self.parseInstFile)
+        self.program = [Instruction.fromDecoded(self.decoded, k) for k in range(len(self.decoded))]
+
+    @staticmethod
+    def parseInstFile(instFile: str) -> List[Instruction]:
+        program = []
         with open(instFile) as f:
             for idx, line in enumerate(f):
                 if line.replace('\u00A0', ' ').replace('Â', ' ').strip():
-                    inst = Instruction(line.strip(), idx)
-                    self.program.append(inst)
+                    program.append(Instruction(line.strip(), idx))
+        return program
 
     def readHardware(self, isDefault: bool, hardwareFile: str):
-        st = ["load", "store", "beq", "call", "add", "sub", "nor", "mul"]
-
         if isDefault:
-            default = [
-                [2, 2, 1],  # load: 2 units, 2 cycles (1 addr + 1 mem), 1 addr cycle
-                [2, 2, 1],  # store: 2 units, 2 cycles (1 addr + 1 mem), 1 addr cycle
-                [1, 1],     # beq: 1 unit, 1 cycle
-                [1, 1],     # call/ret: 1 unit, 1 cycle
-                [3, 2],     # add: 3 units, 2 cycles
-                [1, 2],     # sub: 1 unit, 2 cycles (shares with add)
-                [1, 1],     # nor: 1 unit, 1 cycle (shares with add)
-                [2, 10]     # mul: 2 units, 10 cycles
-            ]
-            
-            rsId = 0
-            for i in range(self.nStationTypes):
-                nUnits = default[i][0]
-                execCycles = default[i][1]
-                addrCycles = default[i][2] if i < 2 else 0
-
-                for j in range(nUnits):
-                    name = st[i] + (str(j + 1) if nUnits > 1 else "")
-                    rs = ReservationStation(name, rsId + 1, execCycles, addrCycles)
-                    self.stations[i].append(rs)
-                    self.idToRs[rsId + 1] = (i, len(self.stations[i]) - 1)
-                    rsId += 1
+            self.configureHardware(self.defaultHardware)
         else:
-            with open(hardwareFile) as f:
-                rsId = 0
-                for i in range(self.nStationTypes):
-                    line = f.readline().strip()
-                    if not line:
-                        continue
-                    
-                    parts = line.split()
-                    if len(parts) < 2:
-                        continue
-                        
+            self.configureHardware(self.parseHardwareFile(hardwareFile))
+
+    @classmethod
+    def parseHardwareFile(cls, hardwareFile: str) -> List[Optional[List[int]]]:
+        # One [units, exec cycles(, addr cycles)] row per station type, None for a missing line.
+        # An "issue <width>" line anywhere in the file adds a trailing [issue width] row. Malformed
+        # lines raise ValueError naming the file and line.
+        rows: List[Optional[List[int]]] = []
+        issueWidth = None
+        with open(hardwareFile) as f:
+            for lineNumber, line in enumerate(f, 1):
+                parts = line.strip().split()
+                if parts and parts[0].lower() == "issue":
+                    try:
+                        issueWidth = int(parts[1])
+                    except (IndexError, ValueError):
+                        issueWidth = 0
+                    if issueWidth < 1:
+                        raise ValueError(f"Hardware file {hardwareFile}, line {lineNumber}: "
+                                         "expected 'issue <width>' with a width of at least 1")
+                    continue
+                if len(rows) == cls.nStationTypes:
+                    continue
+                if len(parts) < 2:
+                    rows.append(None)
+                    continue
+
+                i = len(rows)
+                try:
                     nUnits = int(parts[0])
                     execCycles = int(parts[1])
                     addrCycles = int(parts[2]) if i < 2 and len(parts) > 2 else 0
+                except ValueError:
+                    raise ValueError(f"Hardware file {hardwareFile}, line {lineNumber}: expected "
+                                     f"'<units> <cycles>{' <addr cycles>' if i < 2 else ''}' for {cls.stationNames[i]}")
+                rows.append([nUnits, execCycles, addrCycles])
+
+        rows += [None] * (cls.nStationTypes - len(rows))
+        if issueWidth is not None:
+            rows.append([issueWidth])
+        return rows
+
+    def configureHardware(self, rows: List[Optional[List[int]]]):
+        rsId = 0
+        for i in range(self.nStationTypes):
+            if rows[i] is None:
+                continue
 
-                    for j in range(nUnits):
-                        name = st[i] + (str(j + 1) if nUnits > 1 else "")
-                        rs = ReservationStation(name, rsId + 1, execCycles, addrCycles)
-                        self.stations[i].append(rs)
-                        self.idToRs[rsId + 1] = (i, len(self.stations[i]) - 1)
-                        rsId += 1
+            nUnits = rows[i][0]
+            execCycles = rows[i][1]
+            addrCycles = rows[i][2] if i < 2 and len(rows[i]) > 2 else 0
+
+            for j in range(nUnits):
+                name = self.stationNames[i] + (str(j + 1) if nUnits > 1 else "")
+                rs = ReservationStation(name, rsId + 1, execCycles, addrCycles)
+                self.stations[i].append(rs)
+                self.idToRs[rsId + 1] = (i, len(self.stations[i]) - 1)
+                rsId += 1
+
+        if len(rows) > self.nStationTypes and rows[self.nStationTypes] is not None:
+            self.setIssueWidth(rows[self.nStationTypes][0])
+        self.resetUtilization()
+
+    def resetUtilization(self):
+        self.occupancyHistogram = [[0] * (len(self.stations[i]) + 1) for i in range(self.nStationTypes)]
+        self.lsqDepthHistogram = [0] * (len(self.stations[0]) + len(self.stations[1]) + 1)
+        self.issueStalls = [0] * len(self.stallCauses)
+        self.cdbBusyCycles = 0
+        self.storePortBusyCycles = 0
+
+    def bindNextCycle(self):
+        # Called at the start of each run, once the configuration is final. Profiling keeps the
+        # generic cycle so every phase goes through its timing wrapper.
+        self.__dict__.pop("nextCycle", None)
+        if not self.specializeCycle or self.profile is not None:
+            return
+        if any(getattr(type(self), name) is not getattr(Tomasulo, name) for name in self.specializedMethods):
+            return
+        cycleFunction = compileNextCycle(self)
+        if cycleFunction is not None:
+            self.nextCycle = cycleFunction.__get__(self)
+
+    def enableProfiling(self):
+        # Shadow each profiled method with a timing wrapper on this instance only, so an
+        # unprofiled simulator runs the plain class methods
+        if self.profile is not None:
+            return
+        self.profile = {name: [0, 0.0] for name in self.profiledPhases}
+        for name in self.profiledPhases:
+            setattr(self, name, self.timedPhase(self.profile[name], getattr(self, name)))
+
+    def disableProfiling(self):
+        if self.profile is None:
+            return
+        for name in self.profiledPhases:
+            delattr(self, name)
+        self.profile = None
+
+    @staticmethod
+    def timedPhase(stats: List[float], method: Callable) -> Callable:
+        perfCounter = time.perf_counter
+
+        def timed(*args):
+            start = perfCounter()
+            try:
+                return method(*args)
+            finally:
+                stats[0] += 1
+                stats[1] += perfCounter() - start
+        return timed
+
+    def setWritebackPolicy(self, policy: str):
+        if policy not in self.writebackPriority:
+            raise ValueError(f"Unknown write-back policy {policy}, expected one of: {', '.join(self.writebackPriority)}")
+        self.writebackPolicy = policy
+
+    def setIssueWidth(self, width: int):
+        if width < 1:
+            raise ValueError(f"Issue width must be at least 1, got {width}")
+        self.issueWidth = width
+        self.issueHistogram = [0] * (width + 1)
 
     def readMem(self, memFile: str):
         with open(memFile) as f:
@@ -215,202 +433,326 @@ class Tomasulo:
                     if len(parts) == 2:
                         address = int(parts[0])
                         value = int(parts[1])
-                        self.mem[address] = value
+                        self.mem[address] = value & 0xFFFF
+
+    def readMemImage(self, imageFile: str):
+        # Binary image: little-endian 16-bit words from address 0. A full-size image is mapped
+        # copy-on-write instead of read, so stores never reach the file.
+        with open(imageFile, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % 2 or size > 2 * self.memWords:
+                raise ValueError(f"Memory image {imageFile} must hold at most {self.memWords} 16-bit words")
+
+            if size == 2 * self.memWords and sys.byteorder == "little":
+                self.mem = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)).cast('H')
+                return
+
+            words = array('H')
+            words.frombytes(f.read())
+        if sys.byteorder == "big":
+            words.byteswap()
+        self.mem[:len(words)] = words
+
+    def loadMemory(self, memFile: str):
+        if memFile.endswith(self.memImageExtension):
+            self.readMemImage(memFile)
+        else:
+            self.readMem(memFile)
+
+    def dumpMem(self, memFile: str):
+        # Same text format readMem accepts, listing non-zero words only
+        with open(memFile, "w") as f:
+            for address, value in enumerate(self.mem):
+                if value:
+                    f.write(f"{address} {value}\n")
+
+    def dumpMemImage(self, imageFile: str):
+        words = array('H', self.mem)
+        if sys.byteorder == "big":
+            words.byteswap()
+        with open(imageFile, "wb") as f:
+            words.tofile(f)
+
+    def saveMemory(self, memFile: str):
+        if memFile.endswith(self.memImageExtension):
+            self.dumpMemImage(memFile)
+        else:
+            self.dumpMem(memFile)
 
     def issue(self):
+        # Issue up to issueWidth instructions in program order. A full station type stalls the
+        # rest of the group, and CALL/RET end it since the PC waits for their write-back.
+        issued = 0
+        fetched = self.pc
+        while issued < self.issueWidth and self.pc < len(self.program):
+            fetched = self.pc
+            op = self.decoded.op[self.pc]
+            if not self.issueInstruction():
+                break
+            issued += 1
+            if not ADVANCES_PC[op]:
+                break
         if self.pc >= len(self.program):
-            return
+            fetched = self.pc  # The group ran into the end of the program
+        elif fetched < 0:
+            fetched = sys.maxsize  # A negative PC indexes from the end of the program
+        if fetched > self.fetchFrontier:
+            self.fetchFrontier = fetched
+        self.issueHistogram[issued] += 1
+        if issued == 0:
+            self.issueStalls[self.issueStallCause()] += 1
 
-        inst = self.program[self.pc]
-        stationType = None
-        
-        if inst.category == InstCategory.LOAD:
-            stationType = 0
-        elif inst.category == InstCategory.STORE:
-            stationType = 1
-        elif inst.category == InstCategory.BEQ:
-            stationType = 2
-        elif inst.category == InstCategory.CALL:
-            stationType = 3
-        elif inst.category == InstCategory.ADDITION:
-            stationType = 4
-        elif inst.category == InstCategory.SUBTRACTION:
-            stationType = 5
-        elif inst.category == InstCategory.NOR:
-            stationType = 6
-        elif inst.category == InstCategory.MUL:
-            stationType = 7
-
-        if stationType is None:
-            return
+    def issueStallCause(self) -> int:
+        # Every station of the needed type is busy; blame what holds up the oldest one
+        busy = [s for s in self.stations[self.decoded.stationType[self.pc]] if s.busy]
+        if not busy:
+            return self.STALL_STRUCTURAL  # No stations of this type configured
+        oldest = min(busy, key=lambda rs: rs.seq)
+        if oldest.qj or oldest.qk:
+            return self.STALL_OPERAND_WAIT
+        if self.states and oldest.seq > self.states[0].seq:
+            return self.STALL_BRANCH_SHADOW
+        return self.STALL_STRUCTURAL
+
+    def issueInstruction(self) -> bool:
+        if self.pc >= len(self.program):
+            return False
+
+        pc = self.pc
+        d = self.decoded
+        op = d.op[pc]
+        stationType = STATION_TYPE[op]
 
         for s in self.stations[stationType]:
             if not s.busy:
+                inst = self.program[pc]
                 inst.issue = self.cycle
                 s.busy = True
-                s.addr = inst.imm
+                s.addr = d.imm[pc]
                 s.oper = inst.oper
                 s.remCyclesAddr = s.cycles_per_addr
                 s.remCyclesExec = s.cycles_per_exec
-                s.instIndex = self.pc
+                s.instIndex = pc
+                s.seq = self.nextSeq
+                s.issueCycle = self.cycle
+                s.execStartCycle = 0
+                s.execEndCycle = 0
+                self.nextSeq += 1
+                self.inFlightOrder.append((s.seq, s))
 
-                if self.registerStatusTable[inst.rs] != 0:
-                    s.qj = self.registerStatusTable[inst.rs]
+                rs = d.rs[pc]
+                if self.registerStatusTable[rs] != 0:
+                    s.qj = self.registerStatusTable[rs]
+                    self.tagWaiters[s.qj].add(s)
                 else:
-                    s.vj = self.registers[inst.rs]
+                    s.vj = self.registers[rs]
                     s.qj = 0
 
-                if inst.category != InstCategory.LOAD and inst.category != InstCategory.CALL:
-                    if self.registerStatusTable[inst.rt] != 0:
-                        s.qk = self.registerStatusTable[inst.rt]
+                if READS_RT[op]:
+                    rt = d.rt[pc]
+                    if self.registerStatusTable[rt] != 0:
+                        s.qk = self.registerStatusTable[rt]
+                        self.tagWaiters[s.qk].add(s)
                     else:
-                        s.vk = self.registers[inst.rt]
+                        s.vk = self.registers[rt]
                         s.qk = 0
 
-                    if inst.rd != 0:
+                    rd = d.rd[pc]
+                    if rd != 0:
                         if not self.states:
-                            self.registerStatusTable[inst.rd] = s.id
+                            self.renameRegister(rd, s.id)
                         else:
-                            self.states[-1].register_stat[inst.rd] = s.id
+                            self.states[-1].register_stat[rd] = s.id
+
+                if IS_MEMORY[op]:
+                    self.loadStoreQueue.append(s.seq)
+                    if stationType == 0:
+                        self.pendingLoads[s.addr].add(s)
 
-                if inst.category in (InstCategory.LOAD, InstCategory.STORE):
-                    self.loadStoreQueue.append(self.pc)
+                self.busyStations += 1
+                self.busyByType[stationType] += 1
+                self.schedule(stationType, s)
+                if s.remCyclesExec == 0:
+                    self.completed(stationType, s)  # No execution cycles configured
 
-                if inst.category in (InstCategory.BEQ, InstCategory.CALL):
+                if IS_CONTROL[op]:
                     if not self.states:
-                        self.states.append(SystemState(self.cycle, self.registerStatusTable))
+                        self.states.append(SystemState(self.cycle, self.registerStatusTable, s.seq))
                     else:
-                        self.states.append(SystemState(self.cycle, self.states[-1].register_stat))
+                        self.states.append(SystemState(self.cycle, self.states[-1].register_stat, s.seq))
 
-                # Only increment PC for non-CALL instructions
-                if inst.category != InstCategory.CALL:
+                # CALL/RET leave the PC alone until they write back
+                if ADVANCES_PC[op]:
                     self.pc += 1
-                print(f"Cycle {self.cycle}: Issued {inst.inst}")
-                break
+                if self.traceEvents:
+                    self.sink.event(EV_ISSUE, self.cycle, pc)
+                return True
+        return False
 
-    def Instructions_logic(self, category: int, station: ReservationStation):
-        inst = self.program[station.instIndex]
-        
-        if category == 0:  # LOAD
-            station.result = self.mem[station.addr]
-        elif category == 2:  # BEQ
-            station.result = int(station.vj == station.vk)  # Changed from != to == for BEQ
-            print(f"Cycle {self.cycle}: BEQ comparison: R{inst.rs}={station.vj}, R{inst.rt}={station.vk}, result={station.result}")
-        elif category == 3:  # CALL
-            if station.oper == InstOp.CALL:
-                station.result = station.instIndex + 1
-            else:  # RET
-                station.result = station.vj
-        elif category == 4:  # ADDITION
-            station.result = station.vj + station.vk
-        elif category == 5:  # SUBTRACTION
-            station.result = station.vj - station.vk
-        elif category == 6:  # NOR
-            station.result = ~(station.vj | station.vk) & 0xFFFF  # Ensure 16-bit result
-        elif category == 7:  # MUL
-            station.result = (station.vj * station.vk) & 0xFFFF  # Ensure 16-bit result
+    def Instructions_logic(self, station: ReservationStation):
+        self.opLogic[self.decoded.op[station.instIndex]](self, station)
+
+    def loadLogic(self, station: ReservationStation):
+        station.result = self.mem[station.addr]
+
+    def storeLogic(self, station: ReservationStation):
+        pass
+
+    def beqLogic(self, station: ReservationStation):
+        station.result = int(station.vj == station.vk)  # Changed from != to == for BEQ
+        if self.traceEvents:
+            self.sink.event(EV_BEQ_COMPARE, self.cycle, station.instIndex, station.vj, station.vk, station.result)
+
+    def callLogic(self, station: ReservationStation):
+        station.result = station.instIndex + 1
+
+    def retLogic(self, station: ReservationStation):
+        station.result = station.vj
+
+    def addLogic(self, station: ReservationStation):
+        station.result = station.vj + station.vk
+
+    def subLogic(self, station: ReservationStation):
+        station.result = station.vj - station.vk
+
+    def norLogic(self, station: ReservationStation):
+        station.result = ~(station.vj | station.vk) & 0xFFFF  # Ensure 16-bit result
+
+    def mulLogic(self, station: ReservationStation):
+        station.result = (station.vj * station.vk) & 0xFFFF  # Ensure 16-bit result
+
+    # Indexed by decoder opcode
+    opLogic = [loadLogic, storeLogic, beqLogic, callLogic, retLogic, addLogic, subLogic, norLogic, mulLogic]
+
+    def effectiveAddress(self, station: ReservationStation) -> int:
+        return (station.addr + station.vj) & 0xFFFF  # 16-bit address
+
+    def returnAddress(self, station: ReservationStation) -> int:
+        return self.registers[1]
 
     def execute(self):
         # Non-Load and Non-Store stations
         for i in range(2, self.nStationTypes):
-            for s in self.stations[i]:
-                if s.busy and self.program[s.instIndex].issue < self.cycle:
-                    if self.states and self.program[s.instIndex].issue > self.states[0].issue:
+            for s in self.scheduledStations(i):
+                if s.busy and s.issueCycle < self.cycle:
+                    if self.states and s.seq > self.states[0].seq:
                         continue
 
-                    if s.qj == 0 and s.qk == 0 and self.program[s.instIndex].issue < self.cycle and s.remCyclesExec:
+                    if s.qj == 0 and s.qk == 0 and s.remCyclesExec:
                         if s.remCyclesExec == s.cycles_per_exec:
                             self.program[s.instIndex].execSt = self.cycle
-                            print(f"Cycle {self.cycle}: Starting execution of {self.program[s.instIndex].inst}")
+                            s.execStartCycle = self.cycle
+                            if self.traceEvents:
+                                self.sink.event(EV_EXEC_START, self.cycle, s.instIndex)
                         s.remCyclesExec -= 1
                         if s.remCyclesExec == 0:
-                            self.Instructions_logic(i, s)
+                            self.Instructions_logic(s)
                             self.program[s.instIndex].execEnd = self.cycle
-                            print(f"Cycle {self.cycle}: Instruction {self.program[s.instIndex].inst} completed execution")
+                            s.execEndCycle = self.cycle
+                            self.completed(i, s)
+                            if self.traceEvents:
+                                self.sink.event(EV_EXEC_END, self.cycle, s.instIndex)
+                        self.advance(i, s)
 
         # Load and Store stations
         queuePop = False
         for i in range(2):
-            for s in self.stations[i]:
-                if s.busy and self.program[s.instIndex].issue < self.cycle:
-                    if self.states and self.program[s.instIndex].issue > self.states[0].issue:
+            for s in self.scheduledStations(i):
+                if s.busy and s.issueCycle < self.cycle:
+                    if self.states and s.seq > self.states[0].seq:
                         continue
 
                     # Address calculation phase
                     if s.remCyclesAddr:
-                        if s.qj == 0 and self.loadStoreQueue and self.loadStoreQueue[0] == s.instIndex:
+                        if s.qj == 0 and self.loadStoreQueue and self.loadStoreQueue[0] == s.seq:
                             if s.remCyclesAddr == s.cycles_per_addr:
                                 self.program[s.instIndex].execSt = self.cycle
+                                s.execStartCycle = self.cycle
                             s.remCyclesAddr -= 1
                             if s.remCyclesAddr == 0:
-                                s.addr = (s.addr + s.vj) & 0xFFFF  # 16-bit address
+                                addr = self.effectiveAddress(s)
+                                if i == 0:
+                                    self.movePendingLoad(s, addr)
+                                s.addr = addr
                                 queuePop = True
-                                print(f"Cycle {self.cycle}: Load address calculation complete for {self.program[s.instIndex].inst}")
+                                if self.traceEvents:
+                                    self.sink.event(EV_ADDR_DONE, self.cycle, s.instIndex)
+                            self.advance(i, s)
                     # Memory access phase
                     elif s.remCyclesExec:
                         if i == 1:  # STORE
-                            war = False  # Write After Read Hazard
-                            for loadS in self.stations[0]:
-                                if (loadS.busy and loadS.remCyclesExec != 0 and
-                                    self.program[loadS.instIndex].issue < self.program[s.instIndex].issue and
-                                    loadS.addr == s.addr):
-                                    war = True
-                                    break
-                            
-                            if not war:
+                            if not self.storeBlockedByLoad(s):
                                 s.remCyclesExec -= 1
                                 if s.remCyclesExec == 0:
                                     self.program[s.instIndex].execEnd = self.cycle
-                                    print(f"Cycle {self.cycle}: Store complete for {self.program[s.instIndex].inst}")
+                                    s.execEndCycle = self.cycle
+                                    self.completed(i, s)
+                                    if self.traceEvents:
+                                        self.sink.event(EV_STORE_DONE, self.cycle, s.instIndex)
+                                self.advance(i, s)
                         else:  # LOAD
                             s.remCyclesExec -= 1
                             if s.remCyclesExec == 0:
                                 self.program[s.instIndex].execEnd = self.cycle
+                                s.execEndCycle = self.cycle
                                 s.result = self.mem[s.addr] & 0xFFFF  # 16-bit result
-                                print(f"Cycle {self.cycle}: Load complete for {self.program[s.instIndex].inst}")
+                                self.completed(i, s)
+                                if self.traceEvents:
+                                    self.sink.event(EV_LOAD_DONE, self.cycle, s.instIndex)
+                            self.advance(i, s)
 
         if queuePop and self.loadStoreQueue:
             self.loadStoreQueue.popleft()
 
-    def writeBack(self):
-        writeSId = -1
-        writeStoreId = -1
-        minIssueTime = sys.maxsize
-        minStoreIssueTime = sys.maxsize
+    def storeBlockedByLoad(self, storeS: ReservationStation) -> bool:
+        # Write After Read Hazard: an older load to the same address has not read memory yet
+        loads = self.pendingLoads.get(storeS.addr)
+        if loads:
+            for loadS in loads:
+                if loadS.remCyclesExec != 0 and loadS.seq < storeS.seq:
+                    return True
+        return False
 
-        # Find the earliest completed instruction for write-back
-        for i in range(self.nStationTypes):
-            for s in self.stations[i]:
-                if s.busy and s.remCyclesExec == 0 and self.program[s.instIndex].execEnd < self.cycle:
-                    if i == 1 and s.qk != 0:  # STORE with unready value
-                        continue
-                    
-                    if self.program[s.instIndex].issue < minIssueTime:
-                        if i == 1:  # STORE
-                            minStoreIssueTime = self.program[s.instIndex].issue
-                            writeStoreId = s.id
-                        else:
-                            minIssueTime = self.program[s.instIndex].issue
-                            writeSId = s.id
+    def movePendingLoad(self, loadS: ReservationStation, addr: int):
+        self.dropPendingLoad(loadS)
+        self.pendingLoads[addr].add(loadS)
+
+    def dropPendingLoad(self, loadS: ReservationStation):
+        loads = self.pendingLoads.get(loadS.addr)
+        if loads is not None:
+            loads.discard(loadS)
+            if not loads:
+                del self.pendingLoads[loadS.addr]
+
+    def writeBack(self):
+        # One store through the memory port and one result on the common data bus per cycle,
+        # each the highest priority finished instance under the write-back policy
+        storeS = self.popCompleted(self.completedStores)
+        writeS = self.popCompleted(self.completedResults)
 
         # Handle STORE write-back first (1 cycle)
-        if writeStoreId != -1:
+        if storeS is not None:
             self.wbInsts += 1
-            stationType, stationIdx = self.idToRs[writeStoreId]
-            writeS = self.stations[stationType][stationIdx]
-            writeS.busy = False
-            self.program[writeS.instIndex].write = self.cycle
-            self.mem[writeS.addr] = writeS.vk & 0xFFFF  # 16-bit result
-            print(f"Cycle {self.cycle}: Writeback STORE {self.program[writeS.instIndex].inst}")
+            self.storePortBusyCycles += 1
+            self.release(1, storeS)
+            self.program[storeS.instIndex].write = self.cycle
+            self.writeMem(storeS.addr, storeS.vk & 0xFFFF)  # 16-bit result
+            if self.traceEvents:
+                self.sink.event(EV_WRITEBACK_STORE, self.cycle, storeS.instIndex)
+            if self.retireHook is not None:
+                self.retire(storeS)
 
         # Handle other instruction write-back (1 cycle)
-        if writeSId != -1:
+        if writeS is not None:
             self.wbInsts += 1
-            stationType, stationIdx = self.idToRs[writeSId]
-            writeS = self.stations[stationType][stationIdx]
-            writeS.busy = False
+            self.cdbBusyCycles += 1
+            stationType = self.idToRs[writeS.id][0]
+            self.release(stationType, writeS)
             self.program[writeS.instIndex].write = self.cycle
-            print(f"Cycle {self.cycle}: Writeback {self.program[writeS.instIndex].inst}")
+            if self.traceEvents:
+                self.sink.event(EV_WRITEBACK, self.cycle, writeS.instIndex)
+            if self.retireHook is not None:
+                self.retire(writeS)
 
             if stationType == 3:  # CALL/RET
                 if writeS.oper == InstOp.CALL:
@@ -420,25 +762,9 @@ class Tomasulo:
                     self.pc = writeS.instIndex + 1 + writeS.addr
                 else:  # RET
                     # Branch to the address stored in R1
-                    self.pc = self.registers[1]
-
-                # Clear system states
-                while self.states:
-                    self.states.popleft()
-
-                # Flush instructions issued after this CALL/RET
-                for i in range(self.nStationTypes):
-                    for s in self.stations[i]:
-                        if s.busy and self.program[s.instIndex].issue > self.program[writeS.instIndex].issue:
-                            s.busy = False
-                            for j in range(self.nRegisters):
-                                if self.registerStatusTable[j] == s.id:
-                                    self.registerStatusTable[j] = 0
-
-                # Flush load/store queue
-                while (self.loadStoreQueue and
-                       self.program[self.loadStoreQueue[-1]].issue > self.program[writeS.instIndex].issue):
-                    self.loadStoreQueue.pop()
+                    self.pc = self.returnAddress(writeS)
+
+                self.flushYounger(writeS)
 
             elif stationType == 2:  # BEQ
                 self.numBne += 1
@@ -446,117 +772,504 @@ class Tomasulo:
                     self.pc = writeS.instIndex + 1 + writeS.addr
                     self.misprediction += 1
 
-                    # Clear system states
-                    while self.states:
-                        self.states.popleft()
-
-                    # Flush instructions issued after this BEQ
-                    for i in range(self.nStationTypes):
-                        for s in self.stations[i]:
-                            if s.busy and self.program[s.instIndex].issue > self.program[writeS.instIndex].issue:
-                                s.busy = False
-                                for j in range(self.nRegisters):
-                                    if self.registerStatusTable[j] == s.id:
-                                        self.registerStatusTable[j] = 0
-
-                    # Flush load/store queue
-                    while (self.loadStoreQueue and
-                           self.program[self.loadStoreQueue[-1]].issue > self.program[writeS.instIndex].issue):
-                        self.loadStoreQueue.pop()
+                    self.flushYounger(writeS)
                 else:  # Branch not taken
                     if self.states:
-                        for i in range(self.nRegisters):
-                            self.registerStatusTable[i] = self.states[0].register_stat[i]
+                        self.restoreRegisterStatus(self.states[0].register_stat)
                         self.states.popleft()
                     self.pc = writeS.instIndex + 1
 
             # Update registers and broadcast results
             if stationType not in (1, 2):  # Not STORE or BEQ
-                for i in range(self.nRegisters):
-                    if i != 0 and self.registerStatusTable[i] == writeS.id:
-                        self.registers[i] = writeS.result & 0xFFFF
-                        self.registerStatusTable[i] = 0
-
-                # Forward result to dependent instructions and start their execution
-                for i in range(self.nStationTypes):
-                    for s in self.stations[i]:
-                        if s.busy and (s.qj == writeS.id or s.qk == writeS.id):
-                            if s.qj == writeS.id:
-                                s.vj = writeS.result & 0xFFFF
-                                s.qj = 0
-                            if s.qk == writeS.id:
-                                s.vk = writeS.result & 0xFFFF
-                                s.qk = 0
-                            # If all dependencies are resolved, start execution immediately
-                            if s.qj == 0 and s.qk == 0:
-                                s.remCyclesExec = s.cycles_per_exec
-                                self.program[s.instIndex].execSt = self.cycle
-                                print(f"Cycle {self.cycle}: Starting execution of {self.program[s.instIndex].inst}")
+                self.broadcast(writeS)
 
             # Update instruction timing
             self.program[writeS.instIndex].write = self.cycle
 
+    def retire(self, s: ReservationStation):
+        self.retireHook((s.seq, s.instIndex, s.issueCycle, s.execStartCycle, s.execEndCycle, self.cycle))
+
+    def programOrderPriority(self, s: ReservationStation) -> Tuple[int, ...]:
+        return (s.seq,)
+
+    def longestLatencyFirstPriority(self, s: ReservationStation) -> Tuple[int, ...]:
+        # Long operations free their station last, so let them leave first; ties go oldest first
+        return (-(s.cycles_per_addr + s.cycles_per_exec), s.seq)
+
+    # Write-back policy name -> priority key, smallest first
+    writebackPriority = {
+        "programOrder": programOrderPriority,
+        "longestLatencyFirst": longestLatencyFirstPriority,
+    }
+
+    def completed(self, stationType: int, s: ReservationStation):
+        # Called when a station's execution finishes; stores also need their value to write back
+        if stationType == 1:
+            if s.qk == 0:
+                heapq.heappush(self.completedStores, (self.writebackPriority[self.writebackPolicy](self, s), s.seq, s.id))
+        else:
+            heapq.heappush(self.completedResults, (self.writebackPriority[self.writebackPolicy](self, s), s.seq, s.id))
+
+    def popCompleted(self, heap: List[Tuple[Tuple[int, ...], int, int]]) -> Optional[ReservationStation]:
+        s = self.peekCompleted(heap)
+        if s is not None:
+            heapq.heappop(heap)
+        return s
+
+    def peekCompleted(self, heap: List[Tuple[Tuple[int, ...], int, int]]) -> Optional[ReservationStation]:
+        # Drop entries whose instance was flushed, written back, or restarted by a broadcast
+        while heap:
+            _, seq, sid = heap[0]
+            stationType, stationIdx = self.idToRs[sid]
+            s = self.stations[stationType][stationIdx]
+            if s.busy and s.seq == seq and s.remCyclesExec == 0:
+                return s
+            heapq.heappop(heap)
+        return None
+
+    def renameRegister(self, reg: int, tag: int):
+        self.registerStatusTable[reg] = tag
+        self.tagRegisters[tag].add(reg)
+
+    def restoreRegisterStatus(self, registerStat: List[int]):
+        self.registerStatusTable[:] = registerStat
+        self.tagRegisters.clear()
+        for reg, tag in enumerate(registerStat):
+            if tag:
+                self.tagRegisters[tag].add(reg)
+
+    def flushYounger(self, branchS: ReservationStation):
+        # Clear system states
+        self.states.clear()
+
+        # Flush instructions issued after the branch: exactly the tail of the in-flight order
+        order = self.inFlightOrder
+        while order and order[-1][0] > branchS.seq:
+            seq, s = order.pop()
+            if s.busy and s.seq == seq:
+                self.release(self.idToRs[s.id][0], s)
+                for reg in self.tagRegisters.pop(s.id, ()):
+                    if self.registerStatusTable[reg] == s.id:
+                        self.registerStatusTable[reg] = 0
+
+        # Flush load/store queue
+        while self.loadStoreQueue and self.loadStoreQueue[-1] > branchS.seq:
+            self.loadStoreQueue.pop()
+
+    def broadcast(self, writeS: ReservationStation):
+        result = writeS.result & 0xFFFF
+        for reg in sorted(self.tagRegisters.pop(writeS.id, ())):
+            if reg != 0 and self.registerStatusTable[reg] == writeS.id:
+                self.registers[reg] = result
+                self.registerStatusTable[reg] = 0
+
+        # Forward result to dependent instructions and start their execution
+        for s in sorted(self.tagWaiters.pop(writeS.id, ()), key=lambda rs: rs.id):
+            if s.busy and (s.qj == writeS.id or s.qk == writeS.id):
+                if s.qj == writeS.id:
+                    s.vj = result
+                    s.qj = 0
+                if s.qk == writeS.id:
+                    s.vk = result
+                    s.qk = 0
+                # If all dependencies are resolved, start execution immediately
+                if s.qj == 0 and s.qk == 0:
+                    s.remCyclesExec = s.cycles_per_exec
+                    self.program[s.instIndex].execSt = self.cycle
+                    s.execStartCycle = self.cycle
+                    if self.traceEvents:
+                        self.sink.event(EV_EXEC_START, self.cycle, s.instIndex)
+                stationType = self.idToRs[s.id][0]
+                if stationType == 1 and s.remCyclesExec == 0 and s.qk == 0:
+                    self.completed(stationType, s)  # Finished store whose value just arrived
+                self.schedule(stationType, s)
+
+    def hasPendingWork(self, stationType: int, s: ReservationStation) -> bool:
+        if stationType < 2:
+            # Address calculation waits on the base register, the memory phase does not
+            if s.remCyclesAddr:
+                return s.qj == 0
+            return s.remCyclesExec != 0
+        return s.qj == 0 and s.qk == 0 and s.remCyclesExec != 0
+
+    def schedule(self, stationType: int, s: ReservationStation):
+        # Called when a station is issued or its operands arrive
+        self.inFlightStations[stationType].discard(s)
+        if s.busy and self.hasPendingWork(stationType, s):
+            self.readyStations[stationType].add(s)
+        else:
+            self.readyStations[stationType].discard(s)
+
+    def advance(self, stationType: int, s: ReservationStation):
+        # Called after a station counted down a cycle
+        self.readyStations[stationType].discard(s)
+        if self.hasPendingWork(stationType, s):
+            self.inFlightStations[stationType].add(s)
+        else:
+            self.inFlightStations[stationType].discard(s)
+
+    def release(self, stationType: int, s: ReservationStation):
+        s.busy = False
+        self.busyStations -= 1
+        self.busyByType[stationType] -= 1
+        if stationType == 0:
+            self.dropPendingLoad(s)
+        self.readyStations[stationType].discard(s)
+        self.inFlightStations[stationType].discard(s)
+        order = self.inFlightOrder
+        while order and (not order[0][1].busy or order[0][1].seq != order[0][0]):
+            order.popleft()
+
+    def scheduledStations(self, stationType: int) -> List[ReservationStation]:
+        return sorted(self.readyStations[stationType] | self.inFlightStations[stationType], key=lambda rs: rs.id)
+
+    def skipIdleCycles(self, limit: int) -> int:
+        # Returns how many upcoming cycles (at most limit) would only count down in-flight
+        # stations, and advances the simulator over them in one step. Returns 0 when the
+        # current cycle can issue, write back, or start/finish an execution phase.
+        if self.pc > self.fetchFrontier or self.pc < 0:
+            self.fetchFrontier = self.pc if self.pc >= 0 else sys.maxsize
+        if self.pc < len(self.program):
+            if any(not s.busy for s in self.stations[self.decoded.stationType[self.pc]]):
+                return 0
+
+        if self.peekCompleted(self.completedStores) or self.peekCompleted(self.completedResults):
+            return 0
+
+        skip = limit
+        counting: List[Tuple[int, ReservationStation, bool]] = []  # (type, station, counts address cycles)
+        for i in range(self.nStationTypes):
+            for s in self.readyStations[i] | self.inFlightStations[i]:
+                if not s.busy or s.issueCycle >= self.cycle:
+                    continue
+                if self.states and s.seq > self.states[0].seq:
+                    continue
+
+                if i >= 2:
+                    if s.qj or s.qk or not s.remCyclesExec:
+                        continue
+                    if s.remCyclesExec == s.cycles_per_exec:
+                        return 0
+                    remaining, isAddr = s.remCyclesExec, False
+                elif s.remCyclesAddr:
+                    if s.qj or not self.loadStoreQueue or self.loadStoreQueue[0] != s.seq:
+                        continue
+                    if s.remCyclesAddr == s.cycles_per_addr:
+                        return 0
+                    remaining, isAddr = s.remCyclesAddr, True
+                elif s.remCyclesExec:
+                    if i == 1 and self.storeBlockedByLoad(s):
+                        continue
+                    remaining, isAddr = s.remCyclesExec, False
+                else:
+                    continue
+
+                skip = min(skip, remaining - 1)
+                if skip <= 0:
+                    return 0
+                counting.append((i, s, isAddr))
+
+        for i, s, isAddr in counting:
+            if isAddr:
+                s.remCyclesAddr -= skip
+            else:
+                s.remCyclesExec -= skip
+            self.advance(i, s)
+        if self.pc < len(self.program):
+            self.issueHistogram[0] += skip  # Stalled on a structural hazard
+            self.issueStalls[self.issueStallCause()] += skip
+        self.sampleUtilization(skip)
+        self.cycle += skip
+        return skip
+
+    def writeMem(self, addr: int, value: int):
+        if self.memJournal is not None:
+            entry = (addr, self.mem[addr], value)
+            if self.journalPos < len(self.memJournal):
+                self.memJournal[self.journalPos] = entry  # Replaying after a rewind
+            else:
+                self.memJournal.append(entry)
+            self.journalPos += 1
+        self.mem[addr] = value
+
+    def seekMemory(self, journalPos: int):
+        while self.journalPos > journalPos:
+            self.journalPos -= 1
+            addr, old, _ = self.memJournal[self.journalPos]
+            self.mem[addr] = old
+        while self.journalPos < journalPos:
+            addr, _, new = self.memJournal[self.journalPos]
+            self.mem[addr] = new
+            self.journalPos += 1
+
+    def enableCheckpoints(self, interval: int):
+        # Takes effect from the next initiateRunning
+        self.checkpointInterval = interval
+
+    def takeCheckpoint(self) -> Checkpoint:
+        state = copy.deepcopy({name: getattr(self, name) for name in self.checkpointFields})
+        timings = [(inst.issue, inst.execSt, inst.execEnd, inst.write) for inst in self.program]
+        checkpoint = Checkpoint(self.cycle, state, timings, self.journalPos)
+
+        # Keep checkpoints ordered by cycle, replacing one already taken at this cycle
+        k = len(self.checkpoints)
+        while k > 0 and self.checkpoints[k - 1].cycle >= self.cycle:
+            k -= 1
+        if k < len(self.checkpoints) and self.checkpoints[k].cycle == self.cycle:
+            self.checkpoints[k] = checkpoint
+        else:
+            self.checkpoints.insert(k, checkpoint)
+        return checkpoint
+
+    def restoreCheckpoint(self, checkpoint: Checkpoint):
+        # Copy again so the checkpoint can be restored any number of times
+        for name, value in copy.deepcopy(checkpoint.state).items():
+            setattr(self, name, value)
+        for inst, (issue, execSt, execEnd, write) in zip(self.program, checkpoint.timings):
+            inst.issue = issue
+            inst.execSt = execSt
+            inst.execEnd = execEnd
+            inst.write = write
+        self.seekMemory(checkpoint.journalPos)
+
+    def editProgram(self, instructionFile: str) -> int:
+        # Swap in an edited version of the program after a checkpointed run and rewind to the
+        # last checkpoint taken before the issue stage looked at a changed instruction (or the old
+        # end of the program). The next run continues from there, with the same results as a
+        # full rerun. Returns the cycle it continues from, or 0 when the run kept no checkpoints,
+        # in which case the simulator needs a fresh start.
+        decoded = loadProgram(instructionFile, self.parseInstFile)
+        changed = self.decoded.firstDifference(decoded)
+        # Instructions before the first change decode the same, so only their text is updated
+        kept = min(changed, len(decoded))
+        self.program[kept:] = [Instruction.fromDecoded(decoded, k) for k in range(kept, len(decoded))]
+        for k in range(kept):
+            self.program[k].inst = decoded.text[k]
+            self.program[k].index = decoded.lineIndex[k]
+        self.decoded = decoded
+        self.resetTimings()
+        resumable = [c for c in self.checkpoints if c.state["fetchFrontier"] < changed]
+        if not resumable:
+            return 0
+        self.checkpoints = resumable
+        self.restoreCheckpoint(resumable[-1])
+        del self.memJournal[self.journalPos:]
+        self.stopRequested = False
+        self.resumePending = True
+        return self.cycle
+
+    def isFinished(self) -> bool:
+        return self.busyStations == 0 and self.pc >= len(self.program)
+
+    def seekCycle(self, completedCycles: int):
+        # Move to the state after completedCycles cycles of the last checkpointed run: restore the
+        # nearest checkpoint at or before it when that beats the current state, then replay the gap
+        completedCycles = max(0, min(completedCycles, self.runCycles))
+        target = completedCycles + 1
+        best = None
+        for checkpoint in self.checkpoints:
+            if checkpoint.cycle > target:
+                break
+            best = checkpoint
+        if best is not None and (self.cycle > target or best.cycle > self.cycle):
+            self.restoreCheckpoint(best)
+        while self.cycle < target and not self.isFinished():
+            self.nextCycle()
+
     def nextCycle(self):
         if self.pc < len(self.program):
             self.issue()
+        elif self.pc > self.fetchFrontier:
+            self.fetchFrontier = self.pc
         self.writeBack()  # Do writeback first
         self.execute()    # Then execute
+        self.sampleUtilization(1)
         self.cycle += 1
 
+    def drain(self, maxCycles: int) -> int:
+        # Run cycles without issuing until no station is busy, leaving the PC where fetch would
+        # resume, e.g. to hand the architectural state to the functional interpreter
+        cycles = 0
+        while self.busyStations and cycles < maxCycles:
+            self.writeBack()
+            self.execute()
+            self.sampleUtilization(1)
+            self.cycle += 1
+            cycles += 1
+        return cycles
+
+    def sampleUtilization(self, cycles: int):
+        # Record end-of-cycle occupancy for this many identical cycles
+        histogram = self.occupancyHistogram
+        busyByType = self.busyByType
+        for i in range(self.nStationTypes):
+            histogram[i][busyByType[i]] += cycles
+        depth = len(self.loadStoreQueue)
+        if depth >= len(self.lsqDepthHistogram):
+            self.lsqDepthHistogram += [0] * (depth + 1 - len(self.lsqDepthHistogram))
+        self.lsqDepthHistogram[depth] += cycles
+
     def printReservationStations(self):
-        print("\n" + "="*80)
-        print(f'<span style="color: #00b4d8; font-weight: bold;">Cycle {self.cycle - 1}</span>')
-        print("="*80)
+        if self.sink.level < Verbosity.SUMMARY:
+            return
+        write = self.sink.write
+        write("\n" + "="*80)
+        write(f'<span style="color: #00b4d8; font-weight: bold;">Cycle {self.cycle - 1}</span>')
+        write("="*80)
         
         # Print Reservation Stations
-        print('\n<span style="color: #ffd700; font-weight: bold;">Reservation Stations:</span>')
-        print("-"*80)
-        print(f'<span style="color: #00ff00;">{"Name":<8} {"Busy":<6} {"oper":<8} {"Vj":<8} {"Vk":<8} {"Qj":<8} {"Qk":<8} {"Addr":<8}</span>')
-        print("-"*80)
+        write('\n<span style="color: #ffd700; font-weight: bold;">Reservation Stations:</span>')
+        write("-"*80)
+        write(f'<span style="color: #00ff00;">{"Name":<8} {"Busy":<6} {"oper":<8} {"Vj":<8} {"Vk":<8} {"Qj":<8} {"Qk":<8} {"Addr":<8}</span>')
+        write("-"*80)
         
         for i in range(self.nStationTypes):
             for s in self.stations[i]:
                 if s.busy:
                     opStr = self.program[s.instIndex].op_str if s.oper else ""
-                    print(f'<span style="color: #ff69b4;">{s.name:<8} {str(s.busy):<6} {opStr:<8} {s.vj:<8} {s.vk:<8} {s.qj:<8} {s.qk:<8} {s.addr:<8}</span>')
+                    write(f'<span style="color: #ff69b4;">{s.name:<8} {str(s.busy):<6} {opStr:<8} {s.vj:<8} {s.vk:<8} {s.qj:<8} {s.qk:<8} {s.addr:<8}</span>')
                 else:
-                    print(f'<span style="color: #666666;">{s.name:<8} {str(s.busy):<6} {"":<8} {"":<8} {"":<8} {"":<8} {"":<8} {"":<8}</span>')
+                    write(f'<span style="color: #666666;">{s.name:<8} {str(s.busy):<6} {"":<8} {"":<8} {"":<8} {"":<8} {"":<8} {"":<8}</span>')
 
         # Print Register Status
-        print('\n<span style="color: #ffd700; font-weight: bold;">Register Status:</span>')
-        print("-"*80)
-        print(f'<span style="color: #00ff00;">{"Register":<10} {"Status":<10} {"Value":<10}</span>')
-        print("-"*80)
+        write('\n<span style="color: #ffd700; font-weight: bold;">Register Status:</span>')
+        write("-"*80)
+        write(f'<span style="color: #00ff00;">{"Register":<10} {"Status":<10} {"Value":<10}</span>')
+        write("-"*80)
         
         for i in range(self.nRegisters):
             status = f"RS{self.registerStatusTable[i]}" if self.registerStatusTable[i] else "Ready"
             statusColor = "#ff69b4" if self.registerStatusTable[i] else "#00ff00"
-            print(f'<span style="color: {statusColor};">R{i:<9} {status:<10} {self.registers[i]:<10}</span>')
+            write(f'<span style="color: {statusColor};">R{i:<9} {status:<10} {self.registers[i]:<10}</span>')
+        self.sink.flush()
 
     def printFinalInstructionsDetails(self):
-        print("\n" + "="*80)
-        print('<span style="color: #ffd700; font-weight: bold;">Instruction Execution Details</span>')
-        print("="*80)
-        print(f'<span style="color: #00ff00;">{"Instruction":<20} {"Issue":<8} {"Exec Start":<12} {"Exec End":<10} {"Write Back":<12}</span>')
-        print("-"*80)
+        if self.sink.level < Verbosity.SUMMARY:
+            return
+        write = self.sink.write
+        write("\n" + "="*80)
+        write('<span style="color: #ffd700; font-weight: bold;">Instruction Execution Details</span>')
+        write("="*80)
+        write(f'<span style="color: #00ff00;">{"Instruction":<20} {"Issue":<8} {"Exec Start":<12} {"Exec End":<10} {"Write Back":<12}</span>')
+        write("-"*80)
         
         for inst in self.program:
-            print(f'<span style="color: #ff69b4;">{inst.inst:<20} {inst.issue:<8} {inst.execSt:<12} {inst.execEnd:<10} {inst.wb:<12}</span>')
+            write(f'<span style="color: #ff69b4;">{inst.inst:<20} {inst.issue:<8} {inst.execSt:<12} {inst.execEnd:<10} {inst.wb:<12}</span>')
+        self.sink.flush()
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "cycles": self.cycle - 1,
+            "instructions": self.wbInsts,
+            "ipc": self.wbInsts / (self.cycle - 1) if self.cycle > 1 else 0,
+            "branches": self.numBne,
+            "mispredictions": self.misprediction,
+            "mispredictionRate": self.misprediction / self.numBne if self.numBne else 0,
+            "issueWidth": self.issueWidth,
+            "issuedPerCycle": self.issuedPerCycle(),
+            **self.utilizationMetrics(),
+        }
+
+    def utilizationMetrics(self) -> Dict[str, float]:
+        # Scalar summaries of the utilization counters; the histograms themselves are attributes
+        cycles = self.cycle - 1
+        result: Dict[str, float] = {}
+        for i, name in enumerate(self.stationNames):
+            result[f"{name}Occupancy"] = self.averageOf(self.occupancyHistogram[i])
+        for cause, count in zip(self.stallCauses, self.issueStalls):
+            result[f"{cause}Stalls"] = count
+        result["cdbUtilization"] = self.cdbBusyCycles / cycles if cycles else 0
+        result["storePortUtilization"] = self.storePortBusyCycles / cycles if cycles else 0
+        result["avgLsqDepth"] = self.averageOf(self.lsqDepthHistogram)
+        result["maxLsqDepth"] = max((d for d, count in enumerate(self.lsqDepthHistogram) if count), default=0)
+        return result
+
+    @staticmethod
+    def averageOf(histogram: List[int]) -> float:
+        total = sum(histogram)
+        return sum(value * count for value, count in enumerate(histogram)) / total if total else 0
+
+    def issueCycles(self) -> int:
+        # Cycles that had an instruction waiting to issue
+        return sum(self.issueHistogram)
+
+    def issuedPerCycle(self) -> float:
+        cycles = self.issueCycles()
+        return sum(n * count for n, count in enumerate(self.issueHistogram)) / cycles if cycles else 0
+
+    def issueSlotFills(self) -> List[int]:
+        # Slot k is filled in every cycle that issued more than k instructions
+        return [sum(self.issueHistogram[k + 1:]) for k in range(self.issueWidth)]
 
     def printCalculations(self):
-        print("\n" + "="*80)
-        print('<span style="color: #ffd700; font-weight: bold;">Performance Metrics</span>')
-        print("="*80)
+        if self.sink.level < Verbosity.SUMMARY:
+            return
+        write = self.sink.write
+        write("\n" + "="*80)
+        write('<span style="color: #ffd700; font-weight: bold;">Performance Metrics</span>')
+        write("="*80)
         
-        mispredictionRate = self.misprediction / self.numBne if self.numBne else 0
-        ipc = self.wbInsts / (self.cycle - 1) if self.cycle > 1 else 0
+        metrics = self.metrics()
+        mispredictionRate = metrics["mispredictionRate"]
+        ipc = metrics["ipc"]
         
-        print(f'<span style="color: #00ff00;">Total Cycles: </span><span style="color: #ff69b4;">{self.cycle - 1}</span>')
-        print(f'<span style="color: #00ff00;">Instructions Completed: </span><span style="color: #ff69b4;">{self.wbInsts}</span>')
-        print(f'<span style="color: #00ff00;">IPC (Instructions per Cycle): </span><span style="color: #ff69b4;">{ipc:.2f}</span>')
+        write(f'<span style="color: #00ff00;">Total Cycles: </span><span style="color: #ff69b4;">{self.cycle - 1}</span>')
+        write(f'<span style="color: #00ff00;">Instructions Completed: </span><span style="color: #ff69b4;">{self.wbInsts}</span>')
+        write(f'<span style="color: #00ff00;">IPC (Instructions per Cycle): </span><span style="color: #ff69b4;">{ipc:.2f}</span>')
         if self.numBne > 0:
-            print(f'<span style="color: #00ff00;">Branch Instructions: </span><span style="color: #ff69b4;">{self.numBne}</span>')
-            print(f'<span style="color: #00ff00;">Misprediction Rate: </span><span style="color: #ff69b4;">{mispredictionRate:.2%}</span>')
+            write(f'<span style="color: #00ff00;">Branch Instructions: </span><span style="color: #ff69b4;">{self.numBne}</span>')
+            write(f'<span style="color: #00ff00;">Misprediction Rate: </span><span style="color: #ff69b4;">{mispredictionRate:.2%}</span>')
+        if self.issueWidth > 1:
+            issueCycles = self.issueCycles()
+            write(f'<span style="color: #00ff00;">Issue Width: </span><span style="color: #ff69b4;">{self.issueWidth}</span>')
+            write(f'<span style="color: #00ff00;">Issued per Cycle: </span><span style="color: #ff69b4;">{metrics["issuedPerCycle"]:.2f}</span>')
+            for k, filled in enumerate(self.issueSlotFills()):
+                rate = filled / issueCycles if issueCycles else 0
+                write(f'<span style="color: #00ff00;">Issue Slot {k + 1} Filled: </span><span style="color: #ff69b4;">{filled}/{issueCycles} ({rate:.2%})</span>')
+        self.sink.flush()
+
+    def printUtilization(self):
+        if self.sink.level < Verbosity.SUMMARY:
+            return
+        write = self.sink.write
+        write("\n" + "="*80)
+        write('<span style="color: #ffd700; font-weight: bold;">Utilization</span>')
+        write("="*80)
+
+        metrics = self.utilizationMetrics()
+        write(f'<span style="color: #00ff00;">{"Station":<10} {"Units":>6} {"Avg Busy":>10} {"Cycles by busy count (0, 1, ...)"}</span>')
+        write("-"*80)
+        for i, name in enumerate(self.stationNames):
+            if self.stations[i]:
+                histogram = ", ".join(str(count) for count in self.occupancyHistogram[i])
+                write(f'<span style="color: #ff69b4;">{name:<10} {len(self.stations[i]):>6} {metrics[name + "Occupancy"]:>10.2f} {histogram}</span>')
+        write("-"*80)
+        stalls = ", ".join(f"{cause} {count}" for cause, count in zip(self.stallCauses, self.issueStalls))
+        write(f'<span style="color: #00ff00;">Issue Stall Cycles: </span><span style="color: #ff69b4;">{stalls}</span>')
+        write(f'<span style="color: #00ff00;">CDB Utilization: </span><span style="color: #ff69b4;">{metrics["cdbUtilization"]:.2%}</span>')
+        write(f'<span style="color: #00ff00;">Store Port Utilization: </span><span style="color: #ff69b4;">{metrics["storePortUtilization"]:.2%}</span>')
+        write(f'<span style="color: #00ff00;">Load/Store Queue Depth: </span><span style="color: #ff69b4;">avg {metrics["avgLsqDepth"]:.2f}, max {metrics["maxLsqDepth"]}</span>')
+        self.sink.flush()
+
+    def printProfile(self):
+        if self.profile is None or self.sink.level < Verbosity.SUMMARY:
+            return
+        write = self.sink.write
+        write("\n" + "="*80)
+        write('<span style="color: #ffd700; font-weight: bold;">Simulator Profile</span>')
+        write("="*80)
+        write(f'<span style="color: #00ff00;">{"Phase":<14} {"Calls":>10} {"Total ms":>12} {"us/call":>10} {"% of run":>10}</span>')
+        write("-"*80)
+
+        runTime = self.profileRunTime
+        for name in self.profiledPhases:
+            calls, seconds = self.profile[name]
+            perCall = seconds / calls * 1e6 if calls else 0
+            share = seconds / runTime if runTime else 0
+            write(f'<span style="color: #ff69b4;">{name:<14} {calls:>10} {seconds * 1e3:>12.3f} {perCall:>10.2f} {share:>10.2%}</span>')
+        write(f'<span style="color: #00ff00;">Run wall time: </span><span style="color: #ff69b4;">{runTime * 1e3:.3f} ms</span>')
+        write('<span style="color: #666666;">writeBack includes the flushYounger and broadcast time it triggers</span>')
+        self.sink.flush()
 
     def cleanup(self):
         # Reset all state variables
@@ -567,6 +1280,11 @@ class Tomasulo:
         self.wbInsts = 0
         self.loadStoreQueue.clear()
         self.states.clear()
+        self.inFlightOrder.clear()
+        self.nextSeq = 1
+        self.completedStores.clear()
+        self.completedResults.clear()
+        self.pendingLoads.clear()
         
         # Reset all reservation stations
         for stationType in self.stations:
@@ -582,11 +1300,26 @@ class Tomasulo:
                 s.remCyclesAddr = 0
                 s.instIndex = 0
                 s.result = 0
+                s.seq = 0
+                s.issueCycle = 0
+                s.execStartCycle = 0
+                s.execEndCycle = 0
         
         # Reset register status
         self.registerStatusTable = [0] * self.nRegisters
-        
-        # Reset instruction timing
+        self.tagWaiters.clear()
+        self.tagRegisters.clear()
+        for i in range(self.nStationTypes):
+            self.readyStations[i].clear()
+            self.inFlightStations[i].clear()
+        self.busyStations = 0
+        self.busyByType = [0] * self.nStationTypes
+        self.issueHistogram = [0] * (self.issueWidth + 1)
+        self.resetUtilization()
+        self.fetchFrontier = -1
+        self.resetTimings()
+
+    def resetTimings(self):
         for inst in self.program:
             inst.issue = 0
             inst.execSt = 0
@@ -595,41 +1328,102 @@ class Tomasulo:
             inst.write = 0
 
     def initiateRunning(self):
-        initialPc = self.pc  # Save the initial PC value
-        self.cleanup()  # Clean up before starting
-        self.pc = initialPc  # Restore the initial PC value after cleanup
-        stationsBusy = True
-        maxCycles = 1000  # Add a safety limit
-        cycleCount = 0
-
-        while (stationsBusy or self.pc < len(self.program)) and cycleCount < maxCycles:
-            self.nextCycle()
-            cycleCount += 1
+        for _ in self.run():
+            pass
+
+    def streamRetired(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        # Run the program, yielding a record per dynamic instruction as it writes back. Records
+        # are handed over every step, so memory use does not grow with the length of the run.
+        records: List[Tuple[int, int, int, int, int, int]] = []
+        previousHook = self.retireHook
+        self.retireHook = records.append
+        try:
+            for _ in self.run():
+                if records:
+                    yield from records
+                    records.clear()
+        finally:
+            self.retireHook = previousHook
+
+    def run(self) -> Iterator[int]:
+        # initiateRunning as a generator, yielding the cycle count after every step
+        maxCycles = self.maxCycles or sys.maxsize  # Add a safety limit
+        maxInstructions = self.maxInstructions or sys.maxsize
+        if self.resumePending:
+            # Continue from the checkpoint editProgram restored, keeping the earlier checkpoints
+            self.resumePending = False
+            stationsBusy = self.busyStations > 0
+            cycleCount = self.cycle - 1
+        else:
+            initialPc = self.pc  # Save the initial PC value
+            self.cleanup()  # Clean up before starting
+            self.pc = initialPc  # Restore the initial PC value after cleanup
+            stationsBusy = True
+            cycleCount = 0
+            self.checkpoints = []
+            self.memJournal = [] if self.checkpointInterval else None
+            self.journalPos = 0
+        self.bindNextCycle()
+        if self.profile is not None:
+            for stats in self.profile.values():
+                stats[0] = 0
+                stats[1] = 0.0
+        runStart = time.perf_counter()
+
+        while ((stationsBusy or self.pc < len(self.program)) and cycleCount < maxCycles and
+               self.wbInsts < maxInstructions and not self.stopRequested):
+            limit = min(maxCycles - cycleCount, 100 - cycleCount % 100)
+            if self.checkpointInterval:
+                sinceCheckpoint = (self.cycle - 1) % self.checkpointInterval
+                if sinceCheckpoint == 0:
+                    self.takeCheckpoint()
+                limit = min(limit, self.checkpointInterval - sinceCheckpoint)
+
+            skipped = 0
+            if self.eventSkipping:
+                # Never jump past a debug report, a checkpoint or the cycle limit
+                skipped = self.skipIdleCycles(limit)
+            if skipped:
+                cycleCount += skipped
+                stationsBusy = self.busyStations > 0  # Unchanged across the skipped cycles
+            else:
+                self.nextCycle()
+                cycleCount += 1
 
             # Debug information
             if cycleCount % 100 == 0:
-                print(f"\nDebug - Cycle {cycleCount}:")
-                print(f"PC: {self.pc}, Program Length: {len(self.program)}")
-                print(f"Stations Busy: {stationsBusy}")
-                print(f"Instructions Completed: {self.wbInsts}")
-
-            stationsBusy = False
-            for stationType in self.stations:
-                for s in stationType:
-                    if s.busy:
-                        stationsBusy = True
-                        break
-                if stationsBusy:
-                    break
-
-        if cycleCount >= maxCycles:
-            print("\nWarning: Simulation reached maximum cycle limit")
-            print("Current state:")
-            self.printReservationStations()
-            print("\nDebug Information:")
-            print(f"PC: {self.pc}, Program Length: {len(self.program)}")
-            print(f"Instructions Completed: {self.wbInsts}")
-            print(f"Stations Busy: {stationsBusy}")
+                if self.sink.level >= Verbosity.DEBUG:
+                    self.sink.write(f"\nDebug - Cycle {cycleCount}:")
+                    self.sink.write(f"PC: {self.pc}, Program Length: {len(self.program)}")
+                    self.sink.write(f"Stations Busy: {stationsBusy}")
+                    self.sink.write(f"Instructions Completed: {self.wbInsts}")
+
+            stationsBusy = self.busyStations > 0
+            yield cycleCount
+
+        if self.drainAfterBudget and self.wbInsts >= maxInstructions and not self.stopRequested:
+            cycleCount += self.drain(maxCycles - cycleCount)
+            stationsBusy = self.busyStations > 0
+
+        if self.stopRequested:
+            if self.sink.level >= Verbosity.SUMMARY:
+                self.sink.write(f"\nSimulation cancelled after cycle {self.cycle - 1}")
+        elif cycleCount >= maxCycles:
+            if self.sink.level >= Verbosity.SUMMARY:
+                self.sink.write("\nWarning: Simulation reached maximum cycle limit")
+                self.sink.write("Current state:")
+                self.printReservationStations()
+                self.sink.write("\nDebug Information:")
+                self.sink.write(f"PC: {self.pc}, Program Length: {len(self.program)}")
+                self.sink.write(f"Instructions Completed: {self.wbInsts}")
+                self.sink.write(f"Stations Busy: {stationsBusy}")
+        elif self.wbInsts >= maxInstructions and (stationsBusy or self.pc < len(self.program)):
+            if self.sink.level >= Verbosity.SUMMARY:
+                self.sink.write(f"\nSimulation stopped after {self.wbInsts} instructions (instruction budget)")
 
+        self.runCycles = self.cycle - 1
+        self.profileRunTime = time.perf_counter() - runStart
         self.printFinalInstructionsDetails()
-        self.printCalculations()
\ No newline at end of file
+        self.printCalculations()
+        self.printUtilization()
+        self.printProfile()
\ No newline at end of file
@@ -0,0 +1,241 @@
+import json
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from events import NullSink
+from reservation_station import ReservationStation
+from decoder import OP_BEQ, OP_RET, ADVANCES_PC, IS_MEMORY
+from tomasulo import Instruction, Tomasulo
+
+# A control trace is the committed dynamic instruction stream of one run: the PC of every
+# instance in program order, with a value for the instances whose outcome depends on data:
+# 1/0 for a taken/not-taken BEQ, the target PC of a RET, the effective address of a LOAD or
+# STORE, and 0 otherwise. The header also holds the hardware the trace was recorded on.
+CONTROL_MAGIC = b"TCTL"
+CONTROL_VERSION = 2
+CONTROL_HEADER = struct.Struct("<IQI")  # Version, instance count, hardware description length
+
+class TraceMismatch(ValueError):
+    # Replay fetched a PC the trace does not have: the trace belongs to another program or
+    # start PC, or this configuration's timing changed the values that decide control flow
+    pass
+
+def hardwareSignature(sim: Tomasulo) -> str:
+    # Everything besides the program that shapes a run's timing: the cycle counts of every station,
+    # the issue width and the write-back policy
+    return json.dumps({"stations": [[[s.cycles_per_exec, s.cycles_per_addr] for s in stations]
+                                    for stations in sim.stations],
+                       "issueWidth": sim.issueWidth, "writebackPolicy": sim.writebackPolicy})
+
+class ControlTrace:
+    def __init__(self):
+        self.pcs = array('i')
+        self.values = array('i')
+        self.hardware = ""  # hardwareSignature of the recording simulator
+
+    def __len__(self) -> int:
+        return len(self.pcs)
+
+    def append(self, pc: int, value: int):
+        self.pcs.append(pc)
+        self.values.append(value)
+
+    def save(self, path: str):
+        pcs = array('i', self.pcs)
+        values = array('i', self.values)
+        if sys.byteorder == "big":
+            pcs.byteswap()
+            values.byteswap()
+        hardware = self.hardware.encode()
+        with open(path, "wb") as f:
+            f.write(CONTROL_MAGIC)
+            f.write(CONTROL_HEADER.pack(CONTROL_VERSION, len(pcs), len(hardware)))
+            f.write(hardware)
+            pcs.tofile(f)
+            values.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "ControlTrace":
+        trace = cls()
+        with open(path, "rb") as f:
+            if f.read(len(CONTROL_MAGIC)) != CONTROL_MAGIC:
+                raise ValueError(f"{path} is not a control trace")
+            header = f.read(CONTROL_HEADER.size)
+            if len(header) < CONTROL_HEADER.size:
+                raise ValueError(f"Control trace {path} is truncated")
+            version, count, hardwareLength = CONTROL_HEADER.unpack(header)
+            if version != CONTROL_VERSION:
+                raise ValueError(f"Control trace {path} has an unsupported format; record it again")
+            hardware = f.read(hardwareLength)
+            if len(hardware) < hardwareLength:
+                raise ValueError(f"Control trace {path} is truncated")
+            trace.hardware = hardware.decode()
+            try:
+                trace.pcs.fromfile(f, count)
+                trace.values.fromfile(f, count)
+            except EOFError:
+                raise ValueError(f"Control trace {path} is truncated")
+        if sys.byteorder == "big":
+            trace.pcs.byteswap()
+            trace.values.byteswap()
+        return trace
+
+class RecordingTomasulo(Tomasulo):
+    # Runs the full simulation and collects its control trace. Instances write back out of
+    # order, so each one's value waits until every older instance has written back or been
+    # flushed; flushed instances never enter the trace.
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.flushing = False
+        self.resetControlTrace()
+
+    def resetControlTrace(self):
+        self.controlTrace = ControlTrace()
+        self.retiredValues: Dict[int, Tuple[int, int]] = {}  # seq -> (pc, value)
+        self.flushedSeqs: Set[int] = set()
+        self.nextTraceSeq = 1
+
+    def cleanup(self):
+        super().cleanup()
+        self.resetControlTrace()
+        self.controlTrace.hardware = hardwareSignature(self)
+
+    def release(self, stationType: int, s: ReservationStation):
+        super().release(stationType, s)
+        if not self.flushing:
+            self.retiredValues[s.seq] = (s.instIndex, self.controlValue(s))
+
+    def controlValue(self, s: ReservationStation) -> int:
+        op = self.decoded.op[s.instIndex]
+        if op == OP_BEQ:
+            return 1 if s.result else 0
+        if op == OP_RET:
+            return self.returnAddress(s)
+        if IS_MEMORY[op]:
+            return s.addr
+        return 0
+
+    def flushYounger(self, branchS: ReservationStation):
+        self.flushing = True
+        try:
+            super().flushYounger(branchS)
+        finally:
+            self.flushing = False
+        # Everything younger is off the committed path, including instances that already wrote
+        # back in the branch's shadow (possible with zero-cycle stations)
+        for seq in range(max(branchS.seq + 1, self.nextTraceSeq), self.nextSeq):
+            self.retiredValues.pop(seq, None)
+            self.flushedSeqs.add(seq)
+
+    def writeBack(self):
+        super().writeBack()
+        # Append the instances that are now known to be committed, oldest first
+        seq = self.nextTraceSeq
+        while seq < self.nextSeq:
+            if seq in self.retiredValues:
+                self.controlTrace.append(*self.retiredValues.pop(seq))
+            elif seq in self.flushedSeqs:
+                self.flushedSeqs.discard(seq)
+            else:
+                break
+            seq += 1
+        self.nextTraceSeq = seq
+
+def skipLogic(self, station: ReservationStation):
+    pass
+
+class ReplayTomasulo(Tomasulo):
+    # Timing-only simulation driven by a control trace: branch directions, RET targets and
+    # memory addresses come from the trace, so no operation is evaluated and no store is kept.
+    # Instructions fetched past a taken branch or a CALL/RET are not in the trace; they only
+    # occupy stations until it writes back and flushes them.
+    checkpointFields = Tomasulo.checkpointFields + ("tracePos", "wrongPathAfter")
+    opLogic = [skipLogic] * len(Tomasulo.opLogic)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.trace = ControlTrace()
+        self.resetReplay()
+
+    def loadTrace(self, trace: ControlTrace):
+        self.trace = trace
+
+    def resetReplay(self):
+        self.tracePos = 0  # Trace index of the next committed instance to issue
+        self.wrongPathAfter: Optional[int] = None  # seq of the taken branch or CALL/RET being fetched past
+
+    def cleanup(self):
+        super().cleanup()
+        self.resetReplay()
+
+    def issue(self):
+        if self.wrongPathAfter is None and self.tracePos >= len(self.trace):
+            self.pc = len(self.program)  # The trace ended, e.g. it was recorded under a run budget
+            return
+        firstSeq = self.nextSeq
+        super().issue()
+
+        # Match this cycle's issue group against the trace, oldest first. Each station's result
+        # holds its traced value until it is needed: no operation computes one during replay.
+        trace = self.trace
+        order = self.inFlightOrder
+        ops = self.decoded.op
+        for k in range(self.nextSeq - firstSeq, 0, -1):
+            seq, s = order[-k]
+            pc = s.instIndex
+            index = self.tracePos
+            if self.wrongPathAfter is not None or index >= len(trace):
+                # Off the trace: not taken, and the address as if the base register were zero
+                s.result = s.addr if IS_MEMORY[ops[pc]] else 0
+                continue
+            if trace.pcs[index] != pc:
+                raise TraceMismatch(f"Control trace expects PC {trace.pcs[index]} at instance {index}, "
+                                    f"but the program reached PC {pc}")
+            s.result = trace.values[index]
+            self.tracePos = index + 1
+            op = ops[pc]
+            if op == OP_BEQ:
+                if s.result:
+                    self.wrongPathAfter = seq
+            elif not ADVANCES_PC[op]:
+                # Fetch stays at a CALL/RET until it writes back, so repeats of it are flushed too
+                self.wrongPathAfter = seq
+        if self.wrongPathAfter is None and self.tracePos >= len(trace):
+            self.pc = len(self.program)
+
+    def effectiveAddress(self, station: ReservationStation) -> int:
+        return station.result
+
+    def returnAddress(self, station: ReservationStation) -> int:
+        return station.result
+
+    def writeMem(self, addr: int, value: int):
+        pass
+
+    def flushYounger(self, branchS: ReservationStation):
+        super().flushYounger(branchS)
+        if self.wrongPathAfter is not None and branchS.seq <= self.wrongPathAfter:
+            self.wrongPathAfter = None
+
+def recordControlTrace(program: List[Instruction], pc: int, memFile: Optional[str] = None,
+                       hardwareRows: Optional[List[Optional[List[int]]]] = None,
+                       length: int = 0) -> ControlTrace:
+    # Record up to length committed instances on the given hardware, by default the built-in
+    # configuration. With length 0 the run ends at the simulator's usual cycle budget.
+    sim = RecordingTomasulo.fromConfig(program, hardwareRows or Tomasulo.defaultHardware, pc)
+    sim.setSink(NullSink())
+    sim.eventSkipping = True
+    if length:
+        sim.maxCycles = length * 100  # Guards against a program that stops retiring
+    if memFile:
+        sim.loadMemory(memFile)
+    for _ in sim.run():
+        if length and len(sim.controlTrace) >= length:
+            break
+    trace = sim.controlTrace
+    if length and len(trace) > length:
+        del trace.pcs[length:]
+        del trace.values[length:]
+    return trace